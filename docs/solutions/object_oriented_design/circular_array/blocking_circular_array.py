@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+from .circular_array import CircularArray
+
+
+class OverwritingCircularArray(CircularArray):
+    """Lossy circular array: pushing when full overwrites the oldest value.
+
+    Suited to metrics buffers where the latest samples matter most. The
+    number of values lost this way is kept in `dropped`.
+    """
+
+    def __init__(self, MAX_SIZE):
+        super(OverwritingCircularArray, self).__init__(MAX_SIZE)
+        self.dropped = 0
+
+    def push(self, value):
+        if self.size == self.MAX_SIZE:
+            self.pop()
+            self.dropped += 1
+        super(OverwritingCircularArray, self).push(value)
+
+
+class BlockingCircularArray(CircularArray):
+    """Thread-safe circular array whose push and pop wait instead of failing.
+
+    One lock with two conditions makes it safe for any number of producers
+    and consumers. `push` waits for space and `pop` for a value, up to
+    `timeout` seconds, then raise IndexError as the plain array does.
+    """
+
+    def __init__(self, MAX_SIZE):
+        super(BlockingCircularArray, self).__init__(MAX_SIZE)
+        self.lock = threading.Lock()
+        self.not_full = threading.Condition(self.lock)
+        self.not_empty = threading.Condition(self.lock)
+
+    def push(self, value, timeout=None):
+        with self.not_full:
+            if not self.not_full.wait_for(
+                    lambda: self.size < self.MAX_SIZE, timeout):
+                raise IndexError('Array is full')
+            super(BlockingCircularArray, self).push(value)
+            self.not_empty.notify()
+
+    def pop(self, timeout=None):
+        with self.not_empty:
+            if not self.not_empty.wait_for(lambda: self.size > 0, timeout):
+                raise IndexError('Array is empty')
+            value = super(BlockingCircularArray, self).pop()
+            self.not_full.notify()
+            return value
+
+
+class AsyncCircularArray(CircularArray):
+    """Circular array for coroutines: `await push()` / `await pop()` wait.
+
+    Shared by coroutines on one event loop, so it needs no thread lock.
+    A timeout raises IndexError, like the plain array when full or empty.
+    """
+
+    def __init__(self, MAX_SIZE):
+        super(AsyncCircularArray, self).__init__(MAX_SIZE)
+        self.changed = asyncio.Condition()
+
+    async def push(self, value, timeout=None):
+        async with self.changed:
+            await self._wait_locked(lambda: self.size < self.MAX_SIZE,
+                                    timeout, 'Array is full')
+            super(AsyncCircularArray, self).push(value)
+            self.changed.notify_all()
+
+    async def pop(self, timeout=None):
+        async with self.changed:
+            await self._wait_locked(lambda: self.size > 0,
+                                    timeout, 'Array is empty')
+            value = super(AsyncCircularArray, self).pop()
+            self.changed.notify_all()
+            return value
+
+    async def _wait_locked(self, predicate, timeout, message):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not predicate():
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise IndexError(message)
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                raise IndexError(message)
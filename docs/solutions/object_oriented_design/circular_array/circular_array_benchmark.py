@@ -0,0 +1,40 @@
+"""Throughput of the circular array implementations.
+
+Run from `docs/solutions/object_oriented_design`:
+
+    python -m circular_array.circular_array_benchmark
+"""
+import time
+from array import array
+
+from .circular_array import CircularArray
+from .typed_circular_array import TypedCircularArray
+
+
+def bench_typed(num_samples=10**6, chunk_size=1024, MAX_SIZE=4096):
+    """Samples/sec pushed and popped one at a time versus in chunks."""
+    chunk = array('d', range(chunk_size))
+    num_chunks = num_samples // chunk_size
+
+    buffer = CircularArray(MAX_SIZE)
+    start = time.perf_counter()
+    for _ in range(num_chunks):
+        for value in chunk:
+            buffer.push(value)
+        for _ in range(chunk_size):
+            buffer.pop()
+    per_item = num_chunks * chunk_size / (time.perf_counter() - start)
+
+    buffer = TypedCircularArray(MAX_SIZE, 'd')
+    start = time.perf_counter()
+    for _ in range(num_chunks):
+        buffer.push_many(chunk)
+        buffer.pop_many(chunk_size)
+    chunked = num_chunks * chunk_size / (time.perf_counter() - start)
+
+    print('%-12s %14.0f samples/s' % ('per item', per_item))
+    print('%-12s %14.0f samples/s' % ('chunked', chunked))
+
+
+if __name__ == '__main__':
+    bench_typed()
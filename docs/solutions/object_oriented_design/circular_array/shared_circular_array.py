@@ -0,0 +1,121 @@
+import os
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+
+class SharedCircularArray(object):
+    """Byte-record circular array in shared memory, for one producer process
+    handing records to one consumer process without pickling.
+
+    The segment starts with a header holding the read and write positions,
+    then `MAX_SIZE` bytes of ring. Positions are byte counters that only
+    grow; a position's slot is `position % MAX_SIZE`. Each record is a 4-byte
+    length followed by its bytes, or just its bytes when every record is
+    `record_size` long, and may wrap around the end of the ring.
+
+    The producer alone writes `tail` and the consumer alone writes `head`,
+    each only after copying the record, so neither needs a lock. This relies
+    on aligned 8-byte stores not tearing and on stores becoming visible in
+    order, which holds on x86-64; weaker memory models need a fence that
+    pure Python can't issue.
+    """
+
+    HEADER = struct.Struct('<QQQQ')  # head, tail, MAX_SIZE, record_size
+    HEAD, TAIL = 0, 8
+    LENGTH = struct.Struct('<I')
+
+    def __init__(self, MAX_SIZE, record_size=None, name=None):
+        """Create a new segment; use `attach` to open an existing one."""
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=True, size=self.HEADER.size + MAX_SIZE)
+        self.HEADER.pack_into(self.shm.buf, 0, 0, 0, MAX_SIZE,
+                              record_size or 0)
+        self._init_view()
+
+    @classmethod
+    def attach(cls, name):
+        """Open the segment created under `name` by another process."""
+        ring = cls.__new__(cls)
+        # The creator owns the segment. Left tracked, it would be unlinked
+        # by this process's resource tracker when this process exits
+        if sys.version_info >= (3, 13):
+            ring.shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            ring.shm = shared_memory.SharedMemory(name=name)
+            if os.name == 'posix':
+                resource_tracker.unregister(ring.shm._name, 'shared_memory')
+        ring._init_view()
+        return ring
+
+    def _init_view(self):
+        _, _, self.MAX_SIZE, record_size = self.HEADER.unpack_from(
+            self.shm.buf, 0)
+        self.record_size = record_size or None
+        self.ring = self.shm.buf[self.HEADER.size:
+                                 self.HEADER.size + self.MAX_SIZE]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _load(self, offset):
+        return struct.unpack_from('<Q', self.shm.buf, offset)[0]
+
+    def _store(self, offset, value):
+        struct.pack_into('<Q', self.shm.buf, offset, value)
+
+    def __len__(self):
+        """Bytes currently queued, including length prefixes."""
+        return self._load(self.TAIL) - self._load(self.HEAD)
+
+    def _write(self, position, data):
+        start = position % self.MAX_SIZE
+        first = min(len(data), self.MAX_SIZE - start)
+        self.ring[start:start + first] = data[:first]
+        # wrap around
+        self.ring[:len(data) - first] = data[first:]
+
+    def _read(self, position, length):
+        start = position % self.MAX_SIZE
+        first = min(length, self.MAX_SIZE - start)
+        return (bytes(self.ring[start:start + first]) +
+                bytes(self.ring[:length - first]))
+
+    def push(self, record):
+        """Copy `record` to the back of the ring (producer side only)."""
+        if self.record_size is None:
+            record = self.LENGTH.pack(len(record)) + bytes(record)
+        elif len(record) != self.record_size:
+            raise ValueError('Record must be %d bytes' % self.record_size)
+        tail = self._load(self.TAIL)
+        if len(record) > self.MAX_SIZE - (tail - self._load(self.HEAD)):
+            raise IndexError('Array is full')
+        self._write(tail, record)
+        self._store(self.TAIL, tail + len(record))
+
+    def pop(self):
+        """Copy the oldest record out of the ring (consumer side only)."""
+        head = self._load(self.HEAD)
+        if head == self._load(self.TAIL):
+            raise IndexError('Array is empty')
+        if self.record_size is None:
+            length = self.LENGTH.unpack(self._read(head, self.LENGTH.size))[0]
+            head += self.LENGTH.size
+        else:
+            length = self.record_size
+        record = self._read(head, length)
+        self._store(self.HEAD, head + length)
+        return record
+
+    def close(self):
+        self.ring.release()
+        self.shm.close()
+
+    def unlink(self):
+        """Free the segment; call once, from the creating process."""
+        if sys.version_info < (3, 13) and os.name == 'posix':
+            # A forked child shares this process's resource tracker, so its
+            # `attach` dropped our registration too; restore it for unlink
+            resource_tracker.register(self.shm._name, 'shared_memory')
+        self.shm.unlink()
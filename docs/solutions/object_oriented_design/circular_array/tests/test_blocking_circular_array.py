@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import pytest
+from circular_array.blocking_circular_array import (AsyncCircularArray, BlockingCircularArray,
+                                                    OverwritingCircularArray)
+
+
+class TestOverwritingCircularArray():
+
+    def test_push_overwrites_oldest(self):
+        buffer = OverwritingCircularArray(MAX_SIZE=3)
+        for value in range(5):
+            buffer.push(value)
+        assert buffer.dropped == 2
+        assert [buffer.pop() for _ in range(3)] == [2, 3, 4]
+
+
+class TestBlockingCircularArray():
+
+    def setup_method(self, method):
+        self.buffer = BlockingCircularArray(MAX_SIZE=4)
+
+    def test_timeouts(self):
+        with pytest.raises(IndexError):
+            self.buffer.pop(timeout=0.01)
+        for value in range(4):
+            self.buffer.push(value)
+        with pytest.raises(IndexError):
+            self.buffer.push(4, timeout=0.01)
+
+    def test_multiple_producers_and_consumers(self):
+        popped = []
+
+        def producer(offset):
+            for value in range(offset, 400, 4):
+                self.buffer.push(value)
+
+        def consumer():
+            for _ in range(200):
+                popped.append(self.buffer.pop(timeout=5))
+
+        threads = ([threading.Thread(target=producer, args=(n,))
+                    for n in range(4)] +
+                   [threading.Thread(target=consumer) for _ in range(2)])
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(popped) == list(range(400))
+
+
+class TestAsyncCircularArray():
+
+    def test_producer_consumer(self):
+        async def run():
+            buffer = AsyncCircularArray(MAX_SIZE=2)
+
+            async def producer():
+                for value in range(10):
+                    await buffer.push(value)
+
+            task = asyncio.ensure_future(producer())
+            popped = [await buffer.pop(timeout=1) for _ in range(10)]
+            await task
+            with pytest.raises(IndexError):
+                await buffer.pop(timeout=0.01)
+            return popped
+
+        assert asyncio.run(run()) == list(range(10))
@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from circular_array.shared_circular_array import SharedCircularArray
+
+
+def produce(name, count):
+    ring = SharedCircularArray.attach(name)
+    for i in range(count):
+        record = b'record %d' % i
+        while True:
+            try:
+                ring.push(record)
+                break
+            except IndexError:
+                time.sleep(0)
+    ring.close()
+
+
+# Run by a separate interpreter, so it has its own resource tracker
+CONSUMER = '''
+import sys
+sys.path.insert(0, sys.argv[1])
+from circular_array.shared_circular_array import SharedCircularArray
+ring = SharedCircularArray.attach(sys.argv[2])
+print(ring.pop().decode())
+ring.close()
+'''
+
+# Forks a producer that shares this interpreter's resource tracker
+FORKED_PRODUCER = '''
+import multiprocessing, sys
+sys.path.insert(0, sys.argv[1])
+from circular_array.shared_circular_array import SharedCircularArray
+from circular_array.tests.test_shared_circular_array import produce
+ring = SharedCircularArray(MAX_SIZE=64)
+producer = multiprocessing.get_context('fork').Process(
+    target=produce, args=(ring.name, 1))
+producer.start()
+producer.join()
+print(ring.pop().decode())
+ring.close()
+ring.unlink()
+'''
+
+
+def run_script(script, *args):
+    root = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    return subprocess.run([sys.executable, '-c', script, root] + list(args),
+                          capture_output=True, text=True, timeout=60)
+
+
+class TestSharedCircularArray():
+
+    def setup_method(self, method):
+        self.ring = SharedCircularArray(MAX_SIZE=64)
+
+    def teardown_method(self, method):
+        self.ring.close()
+        self.ring.unlink()
+
+    def test_push_pop_wraps_around(self):
+        for i in range(20):
+            self.ring.push(b'x' * i)
+            assert self.ring.pop() == b'x' * i
+        assert len(self.ring) == 0
+        with pytest.raises(IndexError):
+            self.ring.pop()
+        with pytest.raises(IndexError):
+            self.ring.push(b'x' * 61)
+
+    def test_fixed_size_records(self):
+        ring = SharedCircularArray(MAX_SIZE=10, record_size=4)
+        try:
+            ring.push(b'abcd')
+            ring.push(b'efgh')
+            with pytest.raises(IndexError):
+                ring.push(b'ijkl')
+            assert ring.pop() == b'abcd'
+            with pytest.raises(ValueError):
+                ring.push(b'toolong')
+            assert ring.pop() == b'efgh'
+        finally:
+            ring.close()
+            ring.unlink()
+
+    def test_cross_process(self):
+        context = multiprocessing.get_context('fork')
+        producer = context.Process(target=produce,
+                                   args=(self.ring.name, 500))
+        producer.start()
+        received = []
+        deadline = time.monotonic() + 10
+        while len(received) < 500 and time.monotonic() < deadline:
+            try:
+                received.append(self.ring.pop())
+            except IndexError:
+                time.sleep(0)
+        producer.join()
+        assert received == [b'record %d' % i for i in range(500)]
+
+    def test_consumer_exit_leaves_the_segment(self):
+        self.ring.push(b'hello')
+        result = run_script(CONSUMER, self.ring.name)
+        assert result.stdout == 'hello\n'
+        assert 'leaked' not in result.stderr
+        consumer = SharedCircularArray.attach(self.ring.name)
+        self.ring.push(b'again')
+        assert consumer.pop() == b'again'
+        consumer.close()
+
+    def test_forked_producer_leaves_unlink_clean(self):
+        result = run_script(FORKED_PRODUCER)
+        assert result.stdout == 'record 0\n'
+        assert result.stderr == ''
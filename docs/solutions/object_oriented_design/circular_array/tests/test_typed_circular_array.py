@@ -0,0 +1,49 @@
+from array import array
+
+import pytest
+from circular_array.typed_circular_array import TypedCircularArray
+
+
+class TestTypedCircularArray():
+
+    def setup_method(self, method):
+        self.buffer = TypedCircularArray(MAX_SIZE=5, typecode='q')
+
+    def test_push_many_wraps_around(self):
+        self.buffer.push_many([1, 2, 3])
+        assert self.buffer.pop_many(2) == array('q', [1, 2])
+        self.buffer.push_many(array('q', [4, 5, 6, 7]))
+        assert self.buffer.back == 2
+        views = self.buffer.peek_view()
+        assert [view.tolist() for view in views] == [[3, 4, 5], [6, 7]]
+        assert self.buffer.pop_many(10) == array('q', [3, 4, 5, 6, 7])
+        assert self.buffer.size == 0
+
+    def test_push_many_when_full(self):
+        self.buffer.push_many([1, 2, 3])
+        with pytest.raises(IndexError):
+            self.buffer.push_many([4, 5, 6])
+        assert self.buffer.size == 3
+
+    def test_peek_view_is_zero_copy(self):
+        self.buffer.push_many([1, 2])
+        view = self.buffer.peek_view(1)[0]
+        self.buffer.array[0] = 10
+        assert view[0] == 10
+
+    def test_single_push_pop(self):
+        self.buffer.push(1)
+        self.buffer.push_many(b'\x02' + b'\x00' * 7)
+        assert self.buffer.pop() == 1
+        assert self.buffer.pop() == 2
+
+    def test_push_many_rejects_other_number_kinds(self):
+        floats = TypedCircularArray(MAX_SIZE=5, typecode='d')
+        with pytest.raises(TypeError):
+            floats.push_many(array('q', [1, 2]))
+        with pytest.raises(TypeError):
+            floats.push_many(array('f', [1.0, 2.0]))
+        assert floats.size == 0
+        same_kind = 'l' if array('l').itemsize == 8 else 'q'
+        self.buffer.push_many(array(same_kind, [1, 2]))
+        assert self.buffer.pop_many(2) == array('q', [1, 2])
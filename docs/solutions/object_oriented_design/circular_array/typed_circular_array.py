@@ -0,0 +1,83 @@
+import sys
+from array import array
+
+from .circular_array import CircularArray
+
+
+class TypedCircularArray(CircularArray):
+    """Circular array of machine numbers stored in one contiguous buffer.
+
+    `typecode` is an `array` type code such as 'd' (float64) or 'q' (int64).
+    Values are stored unboxed, and `push_many` / `pop_many` move whole runs
+    with at most two slice copies, one up to the end of the buffer and one
+    after wrapping around. Any C-contiguous buffer of the same kind of
+    number and item size, e.g. an `array` or a NumPy array, can be pushed
+    without conversion; other typed buffers raise TypeError. `bytes` and
+    `bytearray` are taken as raw values in machine format.
+    """
+
+    # Kind of number per struct format: signed, unsigned or floating point
+    KINDS = dict([(code, 'i') for code in 'bhilqn'] +
+                 [(code, 'u') for code in 'BHILQN'] +
+                 [(code, 'f') for code in 'efd'])
+    NATIVE_ORDERS = ('', '@', '=', '<' if sys.byteorder == 'little' else '>')
+
+    def __init__(self, MAX_SIZE, typecode='d'):
+        super(TypedCircularArray, self).__init__(MAX_SIZE)
+        self.typecode = typecode
+        self.array = array(typecode, bytes(array(typecode).itemsize * MAX_SIZE))
+        self.view = memoryview(self.array)
+
+    def _as_view(self, values):
+        if isinstance(values, (list, tuple)):
+            values = array(self.typecode, values)
+        view = memoryview(values)
+        if isinstance(values, (bytes, bytearray)):
+            return view.cast(self.typecode)
+        if view.format != self.typecode:
+            code = view.format[-1:]
+            order = view.format[:-1]
+            if (self.KINDS.get(code) != self.KINDS[self.typecode] or
+                    view.itemsize != self.view.itemsize or
+                    order not in self.NATIVE_ORDERS):
+                raise TypeError('Cannot store %r values in a %r array' %
+                                (view.format, self.typecode))
+            view = view.cast('B').cast(self.typecode)
+        return view
+
+    def push_many(self, values):
+        """Push all values to the back of the circular array."""
+        values = self._as_view(values)
+        count = len(values)
+        if count > self.MAX_SIZE - self.size:
+            raise IndexError('Array is full')
+        first = min(count, self.MAX_SIZE - self.back)
+        self.view[self.back:self.back + first] = values[:first]
+        # wrap around
+        self.view[:count - first] = values[first:]
+        self.back = (self.back + count) % self.MAX_SIZE
+        self.size += count
+
+    def peek_view(self, count=None):
+        """Return the oldest `count` values as up to two zero-copy views.
+
+        The views alias the buffer, so they are only valid until the values
+        they cover are popped and overwritten.
+        """
+        if count is None or count > self.size:
+            count = self.size
+        first = min(count, self.MAX_SIZE - self.front)
+        views = [self.view[self.front:self.front + first]]
+        if count > first:
+            views.append(self.view[:count - first])
+        return views
+
+    def pop_many(self, count):
+        """Pop up to `count` values from the front into a new `array`."""
+        result = array(self.typecode)
+        for view in self.peek_view(count):
+            result.frombytes(view.cast('B'))
+        popped = len(result)
+        self.front = (self.front + popped) % self.MAX_SIZE
+        self.size -= popped
+        return result
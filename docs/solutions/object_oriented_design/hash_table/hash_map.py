@@ -1,5 +1,13 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, it only speeds up bulk hashing
+    np = None
+
+
 class Item(object):
 
+    __slots__ = ('key', 'value')
+
     def __init__(self, key, value):
         self.key = key
         self.value = value
@@ -11,9 +19,43 @@ class HashTable(object):
         self.size = size
         self.table = [[] for _ in range(self.size)]
 
+    @classmethod
+    def from_items(cls, items, size=None):
+        """Build a table from `(key, value)` pairs in one pass.
+
+        The table is sized to one bucket per distinct key unless `size` is
+        given. Later pairs win over earlier ones with the same key.
+        """
+        items = dict(items)
+        table = cls(size or max(1, len(items)))
+        buckets = table.table
+        hash_indexes = table._hash_many(items)
+        # Keys are already distinct, so entries are appended without the
+        # bucket scan that `set` needs to find an existing key
+        new_items = map(Item, items.keys(), items.values())
+        for hash_index, item in zip(hash_indexes, new_items):
+            buckets[hash_index].append(item)
+        return table
+
     def _hash_function(self, key):
         return key % self.size
 
+    def _hash_many(self, keys):
+        """Return the bucket index of every key, vectorised when possible.
+
+        Only int keys go through NumPy: `np.fromiter` would cast floats and
+        numeric strings to int64 and silently put them in the wrong bucket.
+        """
+        if np is not None and all(type(key) is int for key in keys):
+            try:
+                keys = np.fromiter(keys, dtype=np.int64, count=len(keys))
+            except (TypeError, ValueError, OverflowError):
+                pass
+            else:
+                return (keys % self.size).tolist()
+        size = self.size
+        return [key % size for key in keys]
+
     def set(self, key, value):
         hash_index = self._hash_function(key)
         for item in self.table[hash_index]:
@@ -29,6 +71,36 @@ class HashTable(object):
                 return item.value
         raise KeyError('Key not found')
 
+    def set_many(self, items):
+        """Set every `(key, value)` pair, hashing all keys up front."""
+        items = dict(items)
+        buckets = self.table
+        hash_indexes = self._hash_many(items)
+        for hash_index, (key, value) in zip(hash_indexes, items.items()):
+            for item in buckets[hash_index]:
+                if item.key == key:
+                    item.value = value
+                    break
+            else:
+                buckets[hash_index].append(Item(key, value))
+
+    def get_many(self, keys):
+        """Return the values of `keys` in order.
+
+        Raises KeyError if any key is missing.
+        """
+        keys = list(keys)
+        buckets = self.table
+        values = []
+        for hash_index, key in zip(self._hash_many(keys), keys):
+            for item in buckets[hash_index]:
+                if item.key == key:
+                    values.append(item.value)
+                    break
+            else:
+                raise KeyError('Key not found')
+        return values
+
     def remove(self, key):
         hash_index = self._hash_function(key)
         for index, item in enumerate(self.table[hash_index]):
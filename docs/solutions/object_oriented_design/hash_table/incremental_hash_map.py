@@ -0,0 +1,119 @@
+from .hash_map import Item
+
+
+class IncrementalHashTable(object):
+    """Chained hash table that grows without stopping the world.
+
+    Like Redis's dict, a resize allocates a table twice the size and then
+    migrates it a few buckets at a time: every `get`, `set` and `remove`
+    moves up to `REHASH_STEP` buckets from the old table to the new one, so
+    no single operation pays for rehashing the whole table. While migrating,
+    lookups check both tables and new keys go to the new one.
+
+    Buckets are created on first use, so allocating a table is a single
+    `[None] * size` rather than one list per bucket.
+    """
+
+    MIN_SIZE = 8
+    MAX_LOAD = 1.0
+    REHASH_STEP = 4
+
+    def __init__(self, size=MIN_SIZE):
+        capacity = self.MIN_SIZE
+        while capacity < size:
+            capacity <<= 1
+        self.table = [None] * capacity
+        self.new_table = None  # set while a migration is in progress
+        self.rehash_index = 0  # next bucket of `table` to migrate
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        self._rehash_step()
+        return self._find(key, hash(key))[1] is not None
+
+    @property
+    def rehashing(self):
+        return self.new_table is not None
+
+    def _find(self, key, key_hash):
+        """Return `(bucket, item)` for `key`, `(None, None)` if missing."""
+        for table in (self.table, self.new_table):
+            if table is None:
+                continue
+            bucket = table[key_hash & (len(table) - 1)]
+            if bucket is not None:
+                for item in bucket:
+                    if item.key == key:
+                        return bucket, item
+        return None, None
+
+    def set(self, key, value):
+        self._rehash_step()
+        key_hash = hash(key)
+        _, item = self._find(key, key_hash)
+        if item is not None:
+            item.value = value
+            return
+        table = self.new_table if self.rehashing else self.table
+        index = key_hash & (len(table) - 1)
+        if table[index] is None:
+            table[index] = []
+        table[index].append(Item(key, value))
+        self.count += 1
+        if not self.rehashing and self.count > len(self.table) * self.MAX_LOAD:
+            self.new_table = [None] * (2 * len(self.table))
+            self.rehash_index = 0
+
+    def get(self, key):
+        self._rehash_step()
+        _, item = self._find(key, hash(key))
+        if item is None:
+            raise KeyError('Key not found')
+        return item.value
+
+    def remove(self, key):
+        self._rehash_step()
+        bucket, item = self._find(key, hash(key))
+        if item is None:
+            raise KeyError('Key not found')
+        bucket.remove(item)
+        self.count -= 1
+
+    def _rehash_step(self):
+        """Migrate up to `REHASH_STEP` buckets into the new table.
+
+        Visits at most ten empty buckets per bucket moved, as Redis does, so
+        sparse regions of the old table can't make a step expensive.
+        """
+        if self.new_table is None:
+            return
+        old_table = self.table
+        new_table = self.new_table
+        mask = len(new_table) - 1
+        moves = self.REHASH_STEP
+        empty_visits = moves * 10
+        index = self.rehash_index
+        while moves and index < len(old_table):
+            bucket = old_table[index]
+            if bucket is None:
+                index += 1
+                empty_visits -= 1
+                if not empty_visits:
+                    break
+                continue
+            for item in bucket:
+                new_index = hash(item.key) & mask
+                if new_table[new_index] is None:
+                    new_table[new_index] = []
+                new_table[new_index].append(item)
+            old_table[index] = None
+            index += 1
+            moves -= 1
+        self.rehash_index = index
+        if index == len(old_table):
+            self.table = new_table
+            self.new_table = None
+            self.rehash_index = 0
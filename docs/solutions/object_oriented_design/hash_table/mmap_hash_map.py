@@ -0,0 +1,230 @@
+import hashlib
+import mmap
+import os
+import struct
+
+
+class MmapHashTable(object):
+    """File-backed hash table of byte strings stored in fixed-width slots.
+
+    The file is a header followed by `size` slots, probed linearly. Opening a
+    table maps the file, so it is usable immediately with no load step, and
+    every process that opens it shares one copy through the page cache.
+    Writes go straight into the mapping; there must be a single writer, while
+    any number of processes may open the table with `readonly=True`.
+
+    Keys are hashed with BLAKE2b rather than `hash()`, which is randomised
+    per process and would place keys differently in every reader.
+
+    Each slot has a version that is odd while the writer changes the slot,
+    so readers retry rather than return a half-written entry; values are
+    updated in place. This relies on stores becoming visible in order, which
+    holds on x86-64.
+
+    Removed keys leave DELETED slots, which count toward `MAX_LOAD` so that
+    misses don't degrade into full scans. When the table reaches it, `set`
+    rebuilds it into a new file that atomically replaces `path`, twice as
+    large if live entries fill over half of it. The old file's generation
+    is then bumped, and readers remap `path` when they see that.
+    """
+
+    MAGIC = b'MMHT0003'
+    # magic, size, key_size, value_size, generation, count, deleted
+    HEADER = struct.Struct('<8sQHHQQQ')
+    GENERATION = struct.Struct('<Q')
+    GENERATION_OFFSET = 20
+    COUNTS = struct.Struct('<QQ')
+    COUNTS_OFFSET = 28
+    # state, version, hash, key length, value length
+    SLOT_HEADER = struct.Struct('<BIQHH')
+    VERSION = struct.Struct('<I')
+    EMPTY, USED, DELETED = 0, 1, 2
+    MAX_LOAD = 0.75
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._map()
+
+    def _map(self):
+        with open(self.path, 'rb' if self.readonly else 'r+b') as f:
+            access = mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE
+            self.mmap = mmap.mmap(f.fileno(), 0, access=access)
+        (magic, self.size, self.key_size, self.value_size, self.generation,
+         _, _) = self.HEADER.unpack_from(self.mmap, 0)
+        if magic != self.MAGIC:
+            raise ValueError('Not a hash table file: %s' % self.path)
+        self.mask = self.size - 1
+        self.slot_size = (self.SLOT_HEADER.size + self.key_size +
+                          self.value_size)
+
+    def _remap_if_replaced(self):
+        """Map `path` again if the writer has rebuilt the table since."""
+        generation = self.GENERATION.unpack_from(self.mmap,
+                                                 self.GENERATION_OFFSET)[0]
+        if generation != self.generation:
+            self.mmap.close()
+            self._map()
+
+    @classmethod
+    def create(cls, path, size, key_size=32, value_size=64):
+        """Create an empty table file able to hold `size` entries."""
+        num_slots = 8
+        while num_slots * cls.MAX_LOAD < size:
+            num_slots <<= 1
+        slot_size = cls.SLOT_HEADER.size + key_size + value_size
+        with open(path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, num_slots, key_size,
+                                    value_size, 0, 0, 0))
+            f.truncate(cls.HEADER.size + num_slots * slot_size)
+        return cls(path)
+
+    def __len__(self):
+        self._remap_if_replaced()
+        return self._counts()[0]
+
+    def __contains__(self, key):
+        self._remap_if_replaced()
+        return self._find(key)[1] >= 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _hash_function(self, key):
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(),
+                              'little')
+
+    def _offset(self, index):
+        return self.HEADER.size + index * self.slot_size
+
+    def _version(self, offset):
+        return self.VERSION.unpack_from(self.mmap, offset + 1)[0]
+
+    def _find(self, key):
+        """Return `(key_hash, slot, version)` for `key`.
+
+        The slot is -1 if `key` is missing.
+        """
+        key_hash = self._hash_function(key)
+        index = key_hash & self.mask
+        probes = 0
+        while probes < self.size:
+            offset = self._offset(index)
+            (state, version, slot_hash, key_len,
+             _) = self.SLOT_HEADER.unpack_from(self.mmap, offset)
+            if version & 1:
+                continue  # being written, read it again
+            if state == self.EMPTY:
+                return key_hash, -1, version
+            if state == self.USED and slot_hash == key_hash:
+                start = offset + self.SLOT_HEADER.size
+                matches = self.mmap[start:start + key_len] == key
+                if self._version(offset) != version:
+                    continue
+                if matches:
+                    return key_hash, index, version
+            index = (index + 1) & self.mask
+            probes += 1
+        return key_hash, -1, 0
+
+    def _counts(self):
+        """Return `(live entries, DELETED slots)` from the header."""
+        return self.COUNTS.unpack_from(self.mmap, self.COUNTS_OFFSET)
+
+    def _set_counts(self, count, deleted):
+        self.COUNTS.pack_into(self.mmap, self.COUNTS_OFFSET, count, deleted)
+
+    def _write_slot(self, offset, state, key_hash=0, key=b'', value=b''):
+        version = self._version(offset)
+        self.VERSION.pack_into(self.mmap, offset + 1,
+                               (version + 1) & 0xffffffff)
+        if state == self.USED:
+            start = offset + self.SLOT_HEADER.size
+            self.mmap[start:start + len(key)] = key
+            self.mmap[start + self.key_size:
+                      start + self.key_size + len(value)] = value
+            struct.pack_into('<QHH', self.mmap, offset + 5, key_hash,
+                             len(key), len(value))
+        self.mmap[offset] = state
+        self.VERSION.pack_into(self.mmap, offset + 1,
+                               (version + 2) & 0xffffffff)
+
+    def set(self, key, value):
+        if len(key) > self.key_size or len(value) > self.value_size:
+            raise ValueError('Key or value too large for slot')
+        key_hash, index, _ = self._find(key)
+        if index >= 0:
+            self._write_slot(self._offset(index), self.USED, key_hash, key,
+                             value)
+            return
+        count, deleted = self._counts()
+        max_used = self.size * self.MAX_LOAD
+        if count + deleted + 1 > max_used:
+            grow = 2 * (count + 1) > max_used
+            self._rebuild(2 * self.size if grow else self.size)
+            deleted = 0
+        # Reuse the first free slot on the probe path, tombstones included
+        index = key_hash & self.mask
+        while self.mmap[self._offset(index)] == self.USED:
+            index = (index + 1) & self.mask
+        if self.mmap[self._offset(index)] == self.DELETED:
+            deleted -= 1
+        self._write_slot(self._offset(index), self.USED, key_hash, key,
+                         value)
+        self._set_counts(count + 1, deleted)
+
+    def _rebuild(self, size):
+        """Rewrite the live entries into a new file of `size` slots."""
+        tmp_path = self.path + '.rebuild'
+        table = self.create(tmp_path, int(size * self.MAX_LOAD),
+                            self.key_size, self.value_size)
+        with table:
+            self.GENERATION.pack_into(table.mmap, self.GENERATION_OFFSET,
+                                      self.generation + 1)
+            for index in range(self.size):
+                offset = self._offset(index)
+                (state, _, _, key_len,
+                 value_len) = self.SLOT_HEADER.unpack_from(self.mmap, offset)
+                if state == self.USED:
+                    start = offset + self.SLOT_HEADER.size
+                    table.set(self.mmap[start:start + key_len],
+                              self.mmap[start + self.key_size:
+                                        start + self.key_size + value_len])
+        os.replace(tmp_path, self.path)
+        # Readers still mapping the old file see this and remap `path`
+        self.GENERATION.pack_into(self.mmap, self.GENERATION_OFFSET,
+                                  self.generation + 1)
+        self.mmap.close()
+        self._map()
+
+    def get(self, key):
+        self._remap_if_replaced()
+        while True:
+            _, index, version = self._find(key)
+            if index < 0:
+                raise KeyError('Key not found')
+            offset = self._offset(index)
+            value_len = struct.unpack_from('<H', self.mmap, offset + 15)[0]
+            start = offset + self.SLOT_HEADER.size + self.key_size
+            value = self.mmap[start:start + value_len]
+            if self._version(offset) == version:
+                return value
+
+    def remove(self, key):
+        _, index, _ = self._find(key)
+        if index < 0:
+            raise KeyError('Key not found')
+        self._write_slot(self._offset(index), self.DELETED)
+        count, deleted = self._counts()
+        self._set_counts(count - 1, deleted + 1)
+
+    def flush(self):
+        self.mmap.flush()
+
+    def close(self):
+        if not self.readonly:
+            self.mmap.flush()
+        self.mmap.close()
@@ -0,0 +1,131 @@
+from array import array
+
+
+_EMPTY = object()  # slot never used, ends a probe sequence
+_DELETED = object()  # tombstone, skipped by lookups and reused by inserts
+
+
+class OpenHashTable(object):
+    """Hash table using open addressing with linear probing.
+
+    Entries live in three parallel arrays instead of per-bucket lists of
+    `Item` objects: `hashes` (a compact array of machine integers), `keys` and
+    `values`. The table doubles once live entries plus tombstones exceed
+    `MAX_LOAD` of the slots, so probe sequences stay short. Keys can be any
+    hashable object.
+    """
+
+    MIN_SIZE = 8
+    MAX_LOAD = 2 / 3
+
+    def __init__(self, size=MIN_SIZE):
+        self._allocate(self._capacity_for(size))
+
+    def __len__(self):
+        return self.used - self.tombstones
+
+    def __contains__(self, key):
+        return self._find(key, hash(key)) >= 0
+
+    def _capacity_for(self, num_entries):
+        size = self.MIN_SIZE
+        while size * self.MAX_LOAD < num_entries:
+            size <<= 1
+        return size
+
+    def _allocate(self, size):
+        self.size = size
+        self.mask = size - 1
+        self.hashes = array('q', bytes(8 * size))
+        self.keys = [_EMPTY] * size
+        self.values = [None] * size
+        self.used = 0  # live entries plus tombstones
+        self.tombstones = 0
+
+    def _find(self, key, key_hash):
+        """Return the slot holding `key`, or -1 if it is not in the table."""
+        keys = self.keys
+        hashes = self.hashes
+        mask = self.mask
+        index = key_hash & mask
+        while True:
+            slot_key = keys[index]
+            if slot_key is _EMPTY:
+                return -1
+            if (hashes[index] == key_hash and slot_key is not _DELETED and
+                    (slot_key is key or slot_key == key)):
+                return index
+            index = (index + 1) & mask
+
+    def set(self, key, value):
+        key_hash = hash(key)
+        keys = self.keys
+        hashes = self.hashes
+        mask = self.mask
+        index = key_hash & mask
+        tombstone = -1
+        while True:
+            slot_key = keys[index]
+            if slot_key is _EMPTY:
+                break
+            if slot_key is _DELETED:
+                if tombstone < 0:
+                    tombstone = index
+            elif hashes[index] == key_hash and (slot_key is key or
+                                                slot_key == key):
+                self.values[index] = value
+                return
+            index = (index + 1) & mask
+        if tombstone >= 0:
+            index = tombstone
+            self.tombstones -= 1
+        else:
+            self.used += 1
+        keys[index] = key
+        hashes[index] = key_hash
+        self.values[index] = value
+        if self.used > self.size * self.MAX_LOAD:
+            self._resize(self._capacity_for(len(self) + 1))
+
+    def get(self, key):
+        index = self._find(key, hash(key))
+        if index < 0:
+            raise KeyError('Key not found')
+        return self.values[index]
+
+    def remove(self, key):
+        index = self._find(key, hash(key))
+        if index < 0:
+            raise KeyError('Key not found')
+        self.keys[index] = _DELETED
+        self.values[index] = None
+        self.tombstones += 1
+
+    def items(self):
+        for key, value in zip(self.keys, self.values):
+            if key is not _EMPTY and key is not _DELETED:
+                yield key, value
+
+    def _resize(self, size):
+        """Rehash every live entry into a table of `size` slots.
+
+        Also used at the same size to clear out tombstones.
+        """
+        old = zip(self.hashes, self.keys, self.values)
+        self._allocate(size)
+        keys = self.keys
+        hashes = self.hashes
+        values = self.values
+        mask = self.mask
+        used = 0
+        for key_hash, key, value in old:
+            if key is _EMPTY or key is _DELETED:
+                continue
+            index = key_hash & mask
+            while keys[index] is not _EMPTY:
+                index = (index + 1) & mask
+            keys[index] = key
+            hashes[index] = key_hash
+            values[index] = value
+            used += 1
+        self.used = used
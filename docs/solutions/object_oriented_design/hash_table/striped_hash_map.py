@@ -0,0 +1,59 @@
+import threading
+
+from .hash_map import Item
+
+
+class StripedHashTable(object):
+    """Thread-safe chained hash table with one lock per stripe of buckets.
+
+    Buckets are split into `num_stripes` contiguous ranges, each guarded by
+    its own lock, so writers to different ranges never wait on each other.
+
+    Reads take no lock at all. Buckets are immutable tuples that writers
+    replace wholesale rather than edit, so a reader always iterates a
+    complete snapshot of a bucket. Storing a list element or an attribute is
+    atomic both under the GIL and on free-threaded builds, which is all the
+    readers rely on.
+    """
+
+    def __init__(self, size, num_stripes=16):
+        self.size = size
+        self.table = [()] * size
+        self.num_stripes = min(num_stripes, size)
+        self.stripe_width = -(-size // self.num_stripes)
+        self.locks = [threading.Lock() for _ in range(self.num_stripes)]
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.table)
+
+    def _hash_function(self, key):
+        return hash(key) % self.size
+
+    def _lock(self, hash_index):
+        return self.locks[hash_index // self.stripe_width]
+
+    def set(self, key, value):
+        hash_index = self._hash_function(key)
+        with self._lock(hash_index):
+            bucket = self.table[hash_index]
+            for item in bucket:
+                if item.key == key:
+                    item.value = value
+                    return
+            self.table[hash_index] = bucket + (Item(key, value),)
+
+    def get(self, key):
+        for item in self.table[self._hash_function(key)]:
+            if item.key == key:
+                return item.value
+        raise KeyError('Key not found')
+
+    def remove(self, key):
+        hash_index = self._hash_function(key)
+        with self._lock(hash_index):
+            bucket = self.table[hash_index]
+            for index, item in enumerate(bucket):
+                if item.key == key:
+                    self.table[hash_index] = bucket[:index] + bucket[index + 1:]
+                    return
+        raise KeyError('Key not found')
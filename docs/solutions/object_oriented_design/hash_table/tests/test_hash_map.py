@@ -0,0 +1,103 @@
+import pytest
+from hash_table import hash_map
+from hash_table.hash_map import HashTable
+
+
+class FakeArray(object):
+
+    def __init__(self, values):
+        self.values = values
+
+    def __mod__(self, size):
+        return FakeArray([value % size for value in self.values])
+
+    def tolist(self):
+        return list(self.values)
+
+
+class FakeNumpy(object):
+    """Just enough of NumPy for `HashTable._hash_many`."""
+
+    int64 = 'int64'
+
+    def __init__(self):
+        self.arrays = 0
+
+    def fromiter(self, values, dtype, count):
+        values = list(values)
+        for value in values:
+            if not isinstance(value, int):
+                raise TypeError('not an integer')
+            if not -2 ** 63 <= value < 2 ** 63:
+                raise OverflowError('out of int64 range')
+        self.arrays += 1
+        return FakeArray(values)
+
+
+class TestHashTable():
+
+    def test_from_items(self):
+        table = HashTable.from_items([(1, 'a'), (12, 'b'), (1, 'c')])
+        assert table.size == 2
+        assert table.get(1) == 'c'
+        assert table.get(12) == 'b'
+
+    def test_set_many_updates_existing_keys(self):
+        table = HashTable(10)
+        table.set(3, 'a')
+        table.set_many([(3, 'b'), (13, 'c'), (-7, 'd')])
+        assert table.get_many([3, 13, -7]) == ['b', 'c', 'd']
+        assert len(table.table[3]) == 3
+
+    def test_get_many_missing_key(self):
+        table = HashTable.from_items({1: 'a'})
+        with pytest.raises(KeyError):
+            table.get_many([1, 2])
+
+    def test_hash_many_with_numpy(self, monkeypatch):
+        fake_numpy = FakeNumpy()
+        monkeypatch.setattr(hash_map, 'np', fake_numpy)
+        table = HashTable.from_items([(3, 'a'), (13, 'b'), (-7, 'c')],
+                                     size=10)
+        assert fake_numpy.arrays == 1
+        assert table.get_many([3, 13, -7]) == ['a', 'b', 'c']
+        assert len(table.table[3]) == 3
+
+    def test_hash_many_falls_back_for_keys_numpy_rejects(self, monkeypatch):
+        fake_numpy = FakeNumpy()
+        monkeypatch.setattr(hash_map, 'np', fake_numpy)
+        table = HashTable(10)
+        table.set_many([(2 ** 70 + 3, 'a'), (3, 'b')])
+        assert fake_numpy.arrays == 0
+        assert table.get_many([2 ** 70 + 3, 3]) == ['a', 'b']
+        assert fake_numpy.arrays == 0
+
+    def test_hash_many_without_numpy(self, monkeypatch):
+        monkeypatch.setattr(hash_map, 'np', None)
+        table = HashTable.from_items([(3, 'a'), (13, 'b'), (-7, 'c')],
+                                     size=10)
+        assert table.get_many([3, 13, -7]) == ['a', 'b', 'c']
+        assert len(table.table[3]) == 3
+
+    def test_hash_many_with_real_numpy_matches_set(self):
+        pytest.importorskip('numpy')
+
+        def build(build_table, items):
+            try:
+                table = build_table(items)
+            except TypeError:
+                return TypeError
+            return [[(item.key, item.value) for item in bucket]
+                    for bucket in table.table]
+
+        def set_each(items):
+            table = HashTable(10)
+            for key, value in items:
+                table.set(key, value)
+            return table
+
+        for keys in ([3, 13, -7, 2 ** 62, 2 ** 70], [True, 1, 12],
+                     [3, 13.0], [3, 13.7], [3, '13'], ['%d']):
+            items = [(key, i) for i, key in enumerate(keys)]
+            assert build(lambda items: HashTable.from_items(items, size=10),
+                         items) == build(set_each, items)
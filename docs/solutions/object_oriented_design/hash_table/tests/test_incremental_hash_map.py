@@ -0,0 +1,41 @@
+import pytest
+from hash_table.incremental_hash_map import IncrementalHashTable
+
+
+class TestIncrementalHashTable():
+
+    def setup_method(self, method):
+        self.table = IncrementalHashTable()
+
+    def test_set_get_remove(self):
+        self.table.set('foo', 1)
+        self.table.set('foo', 2)
+        assert self.table.get('foo') == 2
+        self.table.remove('foo')
+        assert len(self.table) == 0
+        with pytest.raises(KeyError):
+            self.table.get('foo')
+
+    def test_operations_during_migration(self):
+        for key in range(9):
+            self.table.set(key, key)
+        assert self.table.rehashing
+        self.table.set(0, 'zero')
+        self.table.remove(1)
+        self.table.set(100, 100)
+        assert self.table.get(0) == 'zero'
+        assert 1 not in self.table
+        assert all(self.table.get(key) == key for key in range(2, 9))
+        assert self.table.get(100) == 100
+        assert len(self.table) == 9
+
+    def test_migration_is_bounded_per_operation(self):
+        for key in range(1024):
+            self.table.set(key, key)
+        self.table.set(1024, 1024)
+        assert self.table.rehashing
+        assert self.table.rehash_index <= IncrementalHashTable.REHASH_STEP
+        for key in range(1025, 2000):
+            self.table.set(key, key)
+        assert all(self.table.get(key) == key for key in range(2000))
+        assert len(self.table) == 2000
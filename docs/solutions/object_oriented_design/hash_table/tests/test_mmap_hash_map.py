@@ -0,0 +1,92 @@
+import os
+
+import pytest
+from hash_table.mmap_hash_map import MmapHashTable
+
+
+class TestMmapHashTable():
+
+    def test_persists_across_opens(self, tmp_path):
+        path = str(tmp_path / 'table.bin')
+        with MmapHashTable.create(path, size=100) as table:
+            table.set(b'foo', b'1')
+            table.set(b'bar', b'2')
+            table.set(b'foo', b'3')
+            table.remove(b'bar')
+        with MmapHashTable(path, readonly=True) as table:
+            assert len(table) == 1
+            assert table.get(b'foo') == b'3'
+            assert b'bar' not in table
+            with pytest.raises(KeyError):
+                table.get(b'bar')
+
+    def test_writes_are_visible_to_open_readers(self, tmp_path):
+        path = str(tmp_path / 'table.bin')
+        writer = MmapHashTable.create(path, size=10)
+        reader = MmapHashTable(path, readonly=True)
+        writer.set(b'foo', b'1')
+        assert reader.get(b'foo') == b'1'
+        reader.close()
+        writer.close()
+
+    def test_grows_when_full(self, tmp_path):
+        path = str(tmp_path / 'table.bin')
+        with MmapHashTable.create(path, size=6, key_size=4,
+                                  value_size=4) as table:
+            with pytest.raises(ValueError):
+                table.set(b'too long', b'1')
+            assert table.size == 8
+            for i in range(20):
+                table.set(b'k%d' % i, b'v%d' % i)
+            assert table.size == 32
+            assert len(table) == 20
+            assert all(table.get(b'k%d' % i) == b'v%d' % i
+                       for i in range(20))
+
+    def test_tombstones_are_reclaimed(self, tmp_path):
+        path = str(tmp_path / 'table.bin')
+        with MmapHashTable.create(path, size=24) as table:
+            for i in range(12):
+                table.set(b'live%d' % i, b'v')
+            for i in range(1000):
+                table.set(b'churn%d' % i, b'v')
+                table.set(b'live%d' % (i % 12), b'%d' % i)
+                table.remove(b'churn%d' % i)
+                count, deleted = table._counts()
+                assert count + deleted <= table.size * table.MAX_LOAD
+            assert len(table) == 12
+            assert table.get(b'live3') == b'999'
+            assert b'churn0' not in table
+            states = [table.mmap[table._offset(i)] for i in range(table.size)]
+            assert states.count(table.EMPTY) >= table.size // 4
+
+    def test_updates_are_in_place(self, tmp_path):
+        path = str(tmp_path / 'table.bin')
+        with MmapHashTable.create(path, size=24) as table:
+            for i in range(23):
+                table.set(b'k%d' % i, b'v')
+            inode = os.stat(path).st_ino
+            _, index, version = table._find(b'k0')
+            for i in range(200):
+                table.set(b'k%d' % (i % 23), b'%d' % i)
+            assert os.stat(path).st_ino == inode
+            assert table._counts() == (23, 0)
+            assert table._find(b'k0') == (table._hash_function(b'k0'),
+                                          index, version + 2 * 9)
+            assert table.get(b'k0') == b'184'
+
+    def test_readers_follow_a_rebuild(self, tmp_path):
+        path = str(tmp_path / 'table.bin')
+        writer = MmapHashTable.create(path, size=6, key_size=4, value_size=4)
+        writer.set(b'foo', b'1')
+        reader = MmapHashTable(path, readonly=True)
+        inode = os.stat(path).st_ino
+        for i in range(20):
+            writer.set(b'k%d' % i, b'v')
+        assert os.stat(path).st_ino != inode
+        writer.set(b'foo', b'2')
+        assert reader.get(b'foo') == b'2'
+        assert len(reader) == 21
+        assert reader.size == writer.size
+        reader.close()
+        writer.close()
@@ -0,0 +1,58 @@
+import pytest
+from hash_table.open_hash_map import OpenHashTable
+
+
+class CollidingKey(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def __hash__(self):
+        return 42
+
+    def __eq__(self, other):
+        return isinstance(other, CollidingKey) and other.name == self.name
+
+
+class TestOpenHashTable():
+
+    def setup_method(self, method):
+        self.table = OpenHashTable()
+
+    def test_set_get_remove(self):
+        self.table.set('foo', 1)
+        self.table.set(('bar', 2), 2)
+        self.table.set('foo', 3)
+        assert self.table.get('foo') == 3
+        assert self.table.get(('bar', 2)) == 2
+        self.table.remove('foo')
+        assert 'foo' not in self.table
+        assert len(self.table) == 1
+        with pytest.raises(KeyError):
+            self.table.get('foo')
+        with pytest.raises(KeyError):
+            self.table.remove('foo')
+
+    def test_grows_past_load_factor(self):
+        for key in range(1000):
+            self.table.set(key, key * 2)
+        assert len(self.table) == 1000
+        assert self.table.used <= self.table.size * OpenHashTable.MAX_LOAD
+        assert all(self.table.get(key) == key * 2 for key in range(1000))
+
+    def test_colliding_keys_probe_past_tombstones(self):
+        keys = [CollidingKey(name) for name in 'abc']
+        for key in keys:
+            self.table.set(key, key.name)
+        self.table.remove(keys[0])
+        assert self.table.get(CollidingKey('c')) == 'c'
+        self.table.set(CollidingKey('c'), 'C')
+        assert len(self.table) == 2
+        assert self.table.get(keys[2]) == 'C'
+
+    def test_churn_clears_tombstones(self):
+        for key in range(10000):
+            self.table.set(key, key)
+            self.table.remove(key)
+        assert len(self.table) == 0
+        assert self.table.size == OpenHashTable.MIN_SIZE
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+from hash_table.striped_hash_map import StripedHashTable
+
+
+class TestStripedHashTable():
+
+    def setup_method(self, method):
+        self.table = StripedHashTable(size=64, num_stripes=4)
+
+    def test_set_get_remove(self):
+        self.table.set('foo', 1)
+        self.table.set('foo', 2)
+        assert self.table.get('foo') == 2
+        self.table.remove('foo')
+        with pytest.raises(KeyError):
+            self.table.get('foo')
+        with pytest.raises(KeyError):
+            self.table.remove('foo')
+
+    def test_concurrent_writers_and_readers(self):
+        errors = []
+
+        def writer(offset):
+            for key in range(offset, 2000, 4):
+                self.table.set(key, key)
+
+        def reader():
+            # Key 0 is never removed, so a reader must always find it
+            for _ in range(2000):
+                try:
+                    assert self.table.get(0) == 0
+                except (AssertionError, KeyError) as error:
+                    errors.append(error)
+
+        self.table.set(0, 0)
+        threads = ([threading.Thread(target=writer, args=(n,))
+                    for n in range(4)] +
+                   [threading.Thread(target=reader) for _ in range(2)])
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        assert len(self.table) == 2000
@@ -1,8 +1,10 @@
 class Node(object):
 
-    def __init__(self, results):
+    def __init__(self, query, results):
+        self.query = query
         self.results = results
-        self.next = next
+        self.prev = None
+        self.next = None
 
 
 class LinkedList(object):
@@ -12,13 +14,36 @@ class LinkedList(object):
         self.tail = None
 
     def move_to_front(self, node):
-        pass
+        if node is self.head:
+            return
+        self._unlink(node)
+        self.append_to_front(node)
 
     def append_to_front(self, node):
-        pass
+        node.prev = None
+        node.next = self.head
+        if self.head is not None:
+            self.head.prev = node
+        self.head = node
+        if self.tail is None:
+            self.tail = node
 
     def remove_from_tail(self):
-        pass
+        node = self.tail
+        if node is not None:
+            self._unlink(node)
+        return node
+
+    def _unlink(self, node):
+        if node.prev is not None:
+            node.prev.next = node.next
+        else:
+            self.head = node.next
+        if node.next is not None:
+            node.next.prev = node.prev
+        else:
+            self.tail = node.prev
+        node.prev = node.next = None
 
 
 class Cache(object):
@@ -40,7 +65,7 @@ class Cache(object):
         self.linked_list.move_to_front(node)
         return node.results
 
-    def set(self, results, query):
+    def set(self, query, results):
         """Set the result for the given query key in the cache.
 
         When updating an entry, updates its position to the front of the LRU list.
@@ -61,6 +86,6 @@ class Cache(object):
             else:
                 self.size += 1
             # Add the new key and value
-            new_node = Node(results)
+            new_node = Node(query, results)
             self.linked_list.append_to_front(new_node)
             self.lookup[query] = new_node
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import inspect
+
+from .query_cache_snippets import QueryApi
+
+
+class AsyncCache(object):
+    """Awaitable wrapper around a cache shared by coroutines on one event loop.
+
+    The wrapped cache's `get` and `set` never await, so each runs to
+    completion without another coroutine interleaving and needs no lock.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def __len__(self):
+        return len(self.cache)
+
+    async def get(self, query):
+        return self.cache.get(query)
+
+    async def set(self, query, results):
+        self.cache.set(query, results)
+
+
+class FakeReverseIndexCluster(object):
+    """In-process reverse index cluster with a fixed search latency."""
+
+    def __init__(self, latency=0.01, results_per_query=10):
+        self.latency = latency
+        self.results_per_query = results_per_query
+        self.searches = 0
+
+    async def process_search(self, query):
+        self.searches += 1
+        await asyncio.sleep(self.latency)
+        return ['%s result %d' % (query, i)
+                for i in range(self.results_per_query)]
+
+
+class AsyncQueryApi(QueryApi):
+    """QueryApi for asyncio servers.
+
+    `memory_cache` is an `AsyncCache`. The reverse index cluster may expose a
+    coroutine `process_search`, which is awaited, or a blocking one, which
+    runs in the loop's default executor so it never blocks the loop.
+    Concurrent misses for the same query await a single search.
+    """
+
+    def __init__(self, memory_cache, reverse_index_cluster):
+        super(AsyncQueryApi, self).__init__(memory_cache, reverse_index_cluster)
+        self.in_flight = {}  # key: query, value: search task
+
+    async def process_query(self, query):
+        query = self.parse_query(query)
+        results = await self.memory_cache.get(query)
+        if results is None:
+            task = self.in_flight.get(query)
+            if task is None:
+                task = asyncio.ensure_future(self._search(query))
+                self.in_flight[query] = task
+            results = await asyncio.shield(task)
+        return results
+
+    async def process_queries(self, queries):
+        return list(await asyncio.gather(
+            *[self.process_query(query) for query in queries]))
+
+    async def _search(self, query):
+        try:
+            process_search = self.reverse_index_cluster.process_search
+            if inspect.iscoroutinefunction(process_search):
+                results = await process_search(query)
+            else:
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(None, process_search,
+                                                     query)
+            await self.memory_cache.set(query, results)
+            return results
+        finally:
+            del self.in_flight[query]
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Micro-benchmarks for the query cache.
+
+Run from `docs/solutions/system_design`:
+
+    python -m query_cache.query_cache_benchmark
+"""
+import asyncio
+import random
+import threading
+import time
+
+from .query_cache_async import AsyncCache, AsyncQueryApi, FakeReverseIndexCluster
+from .query_cache_sharded import LockedCache, ShardedCache
+from .query_cache_snippets import Cache, QueryApi
+
+
+def zipf_queries(num_queries, num_distinct, seed=0):
+    """Return query keys whose popularity roughly follows Zipf's law."""
+    rng = random.Random(seed)
+    weights = [1.0 / rank for rank in range(1, num_distinct + 1)]
+    keys = ['query %d' % rank for rank in range(num_distinct)]
+    return rng.choices(keys, weights, k=num_queries)
+
+
+def run_threads(cache, num_threads, queries):
+    """Replay `queries` split across `num_threads`, return ops per second."""
+    def worker(chunk):
+        for query in chunk:
+            if cache.get(query) is None:
+                cache.set(query, [query])
+
+    chunks = [queries[i::num_threads] for i in range(num_threads)]
+    threads = [threading.Thread(target=worker, args=(chunk,))
+               for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(queries) / (time.perf_counter() - start)
+
+
+def bench_sharding(max_size=10000, num_queries=200000,
+                   thread_counts=(1, 2, 4, 8, 16, 32)):
+    queries = zipf_queries(num_queries, num_distinct=max_size * 4)
+    print('%8s %16s %16s' % ('threads', 'locked ops/s', 'sharded ops/s'))
+    for num_threads in thread_counts:
+        locked = run_threads(LockedCache(Cache(max_size)),
+                             num_threads, queries)
+        sharded = run_threads(ShardedCache(max_size), num_threads, queries)
+        print('%8d %16.0f %16.0f' % (num_threads, locked, sharded))
+
+
+def bench_parse_query(num_queries=100000, num_distinct=5000):
+    """Compare queries/sec through `parse_query` with and without the memo."""
+    raw_queries = ['<b>Query</b> %s OR "Term %d" -spam' % (query, len(query))
+                   for query in zipf_queries(num_queries, num_distinct)]
+    api = QueryApi(None, None, typos={'qeury': 'query'})
+    for label, parse in (('pipeline', api._parse),
+                         ('memoized', api.parse_query)):
+        start = time.perf_counter()
+        for raw_query in raw_queries:
+            parse(raw_query)
+        elapsed = time.perf_counter() - start
+        print('%-10s %12.0f queries/s' % (label, num_queries / elapsed))
+
+
+def bench_async(num_queries=2000, latency=0.01,
+                in_flight_limits=(1, 10, 100, 1000)):
+    """Queries/sec of `AsyncQueryApi` on all-miss traffic by in-flight limit."""
+    async def run(limit):
+        api = AsyncQueryApi(AsyncCache(Cache(num_queries)),
+                            FakeReverseIndexCluster(latency=latency))
+        semaphore = asyncio.Semaphore(limit)
+
+        async def one(query):
+            async with semaphore:
+                await api.process_query(query)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[one('query %d' % i)
+                               for i in range(num_queries)])
+        return num_queries / (time.perf_counter() - start)
+
+    print('%10s %14s' % ('in-flight', 'queries/s'))
+    for limit in in_flight_limits:
+        print('%10d %14.0f' % (limit, asyncio.run(run(limit))))
+
+
+if __name__ == '__main__':
+    bench_sharding()
+    bench_parse_query()
+    bench_async()
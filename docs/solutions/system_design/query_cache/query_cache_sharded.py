@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from .query_cache_snippets import Cache
+
+
+class LockedCache(object):
+    """A single cache guarded by one lock, the baseline for `ShardedCache`."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.cache)
+
+    def get(self, query):
+        with self.lock:
+            return self.cache.get(query)
+
+    def set(self, query, results):
+        with self.lock:
+            self.cache.set(query, results)
+
+
+class ShardedCache(object):
+    """Thread-safe cache split into independent LRU segments.
+
+    Each query hashes to one shard, and each shard has its own lock, so
+    threads working on different queries rarely contend. Eviction is LRU
+    within a shard; with a well-mixed hash that closely approximates a single
+    LRU of the same total size.
+    """
+
+    def __init__(self, MAX_SIZE, num_shards=16, cache_factory=Cache):
+        self.num_shards = num_shards
+        shard_size = -(-MAX_SIZE // num_shards)
+        self.shards = [LockedCache(cache_factory(shard_size))
+                       for _ in range(num_shards)]
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def _shard(self, query):
+        return self.shards[hash(query) % self.num_shards]
+
+    def get(self, query):
+        return self._shard(query).get(query)
+
+    def set(self, query, results):
+        self._shard(query).set(query, results)
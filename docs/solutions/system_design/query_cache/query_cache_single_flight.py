@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from .query_cache_snippets import QueryApi
+
+
+class Call(object):
+
+    __slots__ = ('done', 'results', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.results = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Collapse concurrent calls for the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for it and receive the same results, or the same
+    exception if it failed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}  # key: query, value: in-flight call
+
+    def do(self, key, fn, timeout=None):
+        """Return `fn()`, sharing one execution among concurrent callers.
+
+        `timeout` bounds how long a waiting caller blocks for the in-flight
+        call; on expiry it raises `TimeoutError` while the call carries on.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = Call()
+                self.calls[key] = call
+        if leader:
+            try:
+                call.results = fn()
+            except Exception as error:
+                call.error = error
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise TimeoutError('Timed out waiting for in-flight query')
+        if call.error is not None:
+            raise call.error
+        return call.results
+
+
+class CoalescingQueryApi(QueryApi):
+    """QueryApi where concurrent misses for a query share one backend search.
+
+    Meant to be called from many threads, so `memory_cache` should be
+    thread-safe, such as a `ShardedCache`.
+    """
+
+    def __init__(self, memory_cache, reverse_index_cluster, timeout=None):
+        super(CoalescingQueryApi, self).__init__(memory_cache,
+                                                 reverse_index_cluster)
+        self.single_flight = SingleFlight()
+        self.timeout = timeout
+
+    def process_query(self, query):
+        query = self.parse_query(query)
+        results = self.memory_cache.get(query)
+        if results is None:
+            results = self.single_flight.do(
+                query, lambda: self._search(query), self.timeout)
+        return results
+
+    def _search(self, query):
+        # Another flight may have filled the cache after our miss
+        results = self.memory_cache.get(query)
+        if results is None:
+            results = self.reverse_index_cluster.process_search(query)
+            self.memory_cache.set(query, results)
+        return results
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from .query_cache_snippets import Cache, Node
+
+
+def estimate_size(results):
+    """Estimate the bytes held by a list of search results.
+
+    Counts the container plus each result one level deep, which is where
+    almost all of the memory of a result page lives (titles, snippets, urls).
+    """
+    size = sys.getsizeof(results)
+    if isinstance(results, (list, tuple)):
+        size += sum(sys.getsizeof(result) for result in results)
+    elif isinstance(results, dict):
+        size += sum(sys.getsizeof(key) + sys.getsizeof(value)
+                    for key, value in results.items())
+    return size
+
+
+class FrequencySketch(object):
+    """Count-min sketch of recent query frequencies with 4-bit counters.
+
+    Every `sample_size` increments all counters are halved, so old popularity
+    decays and the sketch tracks the recent working set.
+    """
+
+    SEEDS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+    MAX_COUNT = 15
+
+    def __init__(self, width):
+        self.width = 1
+        while self.width < width:
+            self.width <<= 1
+        self.mask = self.width - 1
+        self.table = [bytearray(self.width) for _ in self.SEEDS]
+        self.sample_size = 10 * self.width
+        self.additions = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        return [((h * seed) >> 16) & self.mask for seed in self.SEEDS]
+
+    def increment(self, key):
+        for row, index in zip(self.table, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+        self.additions += 1
+        if self.additions == self.sample_size:
+            self._reset()
+
+    def frequency(self, key):
+        return min(row[index]
+                   for row, index in zip(self.table, self._indexes(key)))
+
+    def _reset(self):
+        for row in self.table:
+            for index in range(self.width):
+                row[index] >>= 1
+        self.additions //= 2
+
+
+class TinyLfuAdmission(object):
+    """Admit a new entry only if it is more popular than what it would evict."""
+
+    def __init__(self, width=1024):
+        self.sketch = FrequencySketch(width)
+
+    def record(self, query):
+        self.sketch.increment(query)
+
+    def admit(self, candidate, victims):
+        frequency = self.sketch.frequency(candidate)
+        return all(frequency > self.sketch.frequency(victim)
+                   for victim in victims)
+
+
+class SizedNode(Node):
+
+    __slots__ = ('nbytes',)
+
+    def __init__(self, query, results, nbytes):
+        super(SizedNode, self).__init__(query, results)
+        self.nbytes = nbytes
+
+
+class SizedCache(Cache):
+    """LRU cache bounded by the estimated bytes of `results`, not entry count.
+
+    `size_estimator` maps a result list to its size in bytes. When an
+    `admission` policy is given, a new entry is only stored if the policy
+    admits it over the entries it would push out, so one-off giant queries
+    can't flush the hot set.
+    """
+
+    def __init__(self, MAX_BYTES, size_estimator=estimate_size, admission=None):
+        super(SizedCache, self).__init__(MAX_SIZE=None)
+        self.MAX_BYTES = MAX_BYTES
+        self.nbytes = 0
+        self.size_estimator = size_estimator
+        self.admission = admission
+
+    def get(self, query):
+        if self.admission is not None:
+            self.admission.record(query)
+        return super(SizedCache, self).get(query)
+
+    def set(self, query, results):
+        """Set the result for the given query key in the cache.
+
+        Entries larger than `MAX_BYTES` are never stored. Otherwise the least
+        recently used entries are evicted until the new entry fits, unless the
+        admission policy rejects the new entry in favour of them.
+        """
+        nbytes = self.size_estimator(results)
+        node = self.lookup.get(query)
+        if node is not None:
+            # Key exists in cache, update the value
+            self._remove(node)
+        if nbytes > self.MAX_BYTES:
+            return
+        victims = self._victims(nbytes)
+        if (node is None and victims and self.admission is not None and
+                not self.admission.admit(query, [v.query for v in victims])):
+            return
+        for victim in victims:
+            self._remove(victim)
+        new_node = SizedNode(query, results, nbytes)
+        self.linked_list.append_to_front(new_node)
+        self.lookup[query] = new_node
+        self.size += 1
+        self.nbytes += nbytes
+
+    def _victims(self, nbytes):
+        """Return the entries to evict, oldest first, to make room for `nbytes`."""
+        victims = []
+        needed = self.nbytes + nbytes - self.MAX_BYTES
+        node = self.linked_list.tail.prev
+        while needed > 0:
+            victims.append(node)
+            needed -= node.nbytes
+            node = node.prev
+        return victims
+
+    def _remove(self, node):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        del self.lookup[node.query]
+        self.size -= 1
+        self.nbytes -= node.nbytes
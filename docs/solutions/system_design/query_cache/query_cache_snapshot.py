@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Dump the query cache to a snapshot file and warm a new cache from it.
+
+Snapshot layout, all integers little-endian:
+
+    header   MAGIC, entry count (u64), values section offset (u64)
+    entries  per entry, most recently used first:
+             key length (u32), value offset (u64), value length (u32), key
+    values   pickled results, each addressed by an entry's value offset
+"""
+import mmap
+import os
+import pickle
+import struct
+
+from .query_cache_snippets import Cache
+
+
+MAGIC = b'QCSNAP01'
+HEADER = struct.Struct('<8sQQ')
+ENTRY = struct.Struct('<IQI')
+
+
+def dump_snapshot(cache, path):
+    """Write every entry of `cache` to `path`, preserving LRU order.
+
+    The file is written next to `path` and renamed into place, so a crash
+    mid-dump never leaves a truncated snapshot behind.
+    """
+    entries = []
+    values = []
+    value_offset = 0
+    node = cache.linked_list.head.next
+    while node is not cache.linked_list.tail:
+        key = node.query.encode('utf-8')
+        value = pickle.dumps(node.results, protocol=pickle.HIGHEST_PROTOCOL)
+        entries.append(ENTRY.pack(len(key), value_offset, len(value)) + key)
+        values.append(value)
+        value_offset += len(value)
+        node = node.next
+    values_start = HEADER.size + sum(len(entry) for entry in entries)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(entries), values_start))
+        f.writelines(entries)
+        f.writelines(values)
+    os.replace(tmp_path, path)
+
+
+class Snapshot(object):
+    """Read-only, memory-mapped view of a snapshot file.
+
+    Opening a snapshot only reads the keys; results are unpickled one at a
+    time when they are asked for, straight from the page cache.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, self.values_start = HEADER.unpack_from(self.mmap, 0)
+        if magic != MAGIC:
+            raise ValueError('Not a query cache snapshot: %s' % path)
+        self.queries = []  # most recently used first
+        self.lookup = {}  # key: query, value: (value offset, value length)
+        position = HEADER.size
+        for _ in range(count):
+            key_len, value_offset, value_len = ENTRY.unpack_from(self.mmap,
+                                                                 position)
+            position += ENTRY.size
+            query = self.mmap[position:position + key_len].decode('utf-8')
+            position += key_len
+            self.queries.append(query)
+            self.lookup[query] = (self.values_start + value_offset, value_len)
+
+    def __len__(self):
+        return len(self.lookup)
+
+    def __contains__(self, query):
+        return query in self.lookup
+
+    def get(self, query):
+        location = self.lookup.get(query)
+        if location is None:
+            return None
+        start, length = location
+        return pickle.loads(self.mmap[start:start + length])
+
+    def pop(self, query):
+        """Return the results for `query` and forget it, None if absent."""
+        results = self.get(query)
+        self.lookup.pop(query, None)
+        return results
+
+    def close(self):
+        self.mmap.close()
+
+
+def load_snapshot(cache, path):
+    """Eagerly insert every snapshot entry into `cache`, restoring LRU order."""
+    snapshot = Snapshot(path)
+    try:
+        for query in reversed(snapshot.queries):
+            cache.set(query, snapshot.get(query))
+    finally:
+        snapshot.close()
+    return cache
+
+
+class WarmCache(Cache):
+    """LRU cache that falls back to a snapshot on a miss.
+
+    Startup costs only opening the snapshot; each snapshot entry is
+    deserialized and promoted into the LRU the first time it is requested.
+    A promoted or overwritten entry is dropped from the snapshot, so an
+    evicted entry never comes back with outdated results.
+    """
+
+    def __init__(self, MAX_SIZE, snapshot):
+        super(WarmCache, self).__init__(MAX_SIZE)
+        self.snapshot = snapshot
+
+    def get(self, query):
+        results = super(WarmCache, self).get(query)
+        if results is None:
+            results = self.snapshot.pop(query)
+            if results is not None:
+                super(WarmCache, self).set(query, results)
+        return results
+
+    def set(self, query, results):
+        self.snapshot.lookup.pop(query, None)
+        super(WarmCache, self).set(query, results)
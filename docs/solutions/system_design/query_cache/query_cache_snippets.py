@@ -1,17 +1,56 @@
 # -*- coding: utf-8 -*-
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import re
+import string
+import sys
+
+
+MARKUP_RE = re.compile(r'<[^>]*>|&(?:[a-z]+|#[0-9]+);', re.IGNORECASE)
+# A leading '-' negates a term, a '-' inside a word just splits it
+TERM_RE = re.compile(r'(?:(?<!\w)-)?\w+')
+# Punctuation other than '-' (negation) separates terms
+PUNCTUATION_TABLE = str.maketrans(
+    {char: ' ' for char in string.punctuation if char != '-'})
 
 
 class QueryApi(object):
 
-    def __init__(self, memory_cache, reverse_index_cluster):
+    def __init__(self, memory_cache, reverse_index_cluster, typos=None,
+                 parse_cache_size=10000):
         self.memory_cache = memory_cache
         self.reverse_index_cluster = reverse_index_cluster
+        self.typos = typos or {}  # key: misspelled term, value: correction
+        # Repeat raw queries skip the pipeline; lru_cache is thread-safe
+        self._parse_cached = functools.lru_cache(maxsize=parse_cache_size)(
+            self._parse)
 
     def parse_query(self, query):
         """Remove markup, break text into terms, deal with typos,
         normalize capitalization, convert to use boolean operations.
         """
-        ...
+        return self._parse_cached(query)
+
+    def _parse(self, query):
+        text = MARKUP_RE.sub(' ', query).translate(PUNCTUATION_TABLE).casefold()
+        terms = []
+        operator = 'AND'
+        for term in TERM_RE.findall(text):
+            if term == 'or':
+                operator = 'OR'
+                continue
+            if term == 'and':
+                continue
+            negate = term[0] == '-'
+            term = term.lstrip('-')
+            if not term:
+                continue
+            term = self.typos.get(term, term)
+            if terms:
+                terms.append(operator)
+            terms.append('NOT ' + term if negate else term)
+            operator = 'AND'
+        return ' '.join(terms)
 
     def process_query(self, query):
         query = self.parse_query(query)
@@ -21,57 +60,129 @@ class QueryApi(object):
             self.memory_cache.set(query, results)
         return results
 
+    def process_queries(self, queries, max_workers=8):
+        """Process a batch of queries, returning their results in order.
+
+        Looks up every query in the cache first, then resolves all distinct
+        misses together: in one call if the cluster offers
+        `process_searches`, otherwise with up to `max_workers` concurrent
+        searches. The results of the misses are then added to the cache.
+        """
+        queries = [self.parse_query(query) for query in queries]
+        found = {}  # key: query, value: results
+        misses = []
+        for query in queries:
+            if query not in found:
+                found[query] = self.memory_cache.get(query)
+                if found[query] is None:
+                    misses.append(query)
+        if misses:
+            searched = self._process_searches(misses, max_workers)
+            for query, results in zip(misses, searched):
+                found[query] = results
+                self.memory_cache.set(query, results)
+        return [found[query] for query in queries]
+
+    def _process_searches(self, queries, max_workers):
+        process_searches = getattr(self.reverse_index_cluster,
+                                   'process_searches', None)
+        if process_searches is not None:
+            return process_searches(queries)
+        if len(queries) == 1 or max_workers <= 1:
+            return [self.reverse_index_cluster.process_search(query)
+                    for query in queries]
+        with ThreadPoolExecutor(min(max_workers, len(queries))) as executor:
+            return list(executor.map(self.reverse_index_cluster.process_search,
+                                     queries))
+
 
 class Node(object):
 
+    # No per-instance __dict__: each entry costs four pointers plus the
+    # object header, which is what dominates a cache holding millions of keys.
+    __slots__ = ('prev', 'next', 'query', 'results')
+
     def __init__(self, query, results):
+        self.prev = None
+        self.next = None
         self.query = query
         self.results = results
 
 
 class LinkedList(object):
+    """Doubly-linked list ordered by recency, head = most recent.
+
+    `head` and `tail` are sentinel nodes that never hold an entry, so linking
+    and unlinking never has to check for an empty list or a missing neighbour.
+    """
 
     def __init__(self):
-        self.head = None
-        self.tail = None
+        self.head = Node(None, None)
+        self.tail = Node(None, None)
+        self.head.next = self.tail
+        self.tail.prev = self.head
 
     def move_to_front(self, node):
-        ...
+        """Detach `node` wherever it is, then insert it at head."""
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        self.append_to_front(node)
 
     def append_to_front(self, node):
-        ...
+        """Insert a brand-new node at head."""
+        first = self.head.next
+        node.prev = self.head
+        node.next = first
+        first.prev = node
+        self.head.next = node
 
     def remove_from_tail(self):
-        ...
+        """Unlink the tail node and return it (the oldest entry)."""
+        node = self.tail.prev
+        if node is self.head:
+            return None
+        node.prev.next = self.tail
+        self.tail.prev = node.prev
+        node.prev = node.next = None
+        return node
 
 
 class Cache(object):
 
     def __init__(self, MAX_SIZE):
+        # None leaves the bound to subclasses, such as SizedCache
+        if MAX_SIZE is not None and MAX_SIZE < 1:
+            raise ValueError('MAX_SIZE must be at least 1')
         self.MAX_SIZE = MAX_SIZE
         self.size = 0
-        self.lookup = {}
+        self.lookup = {}  # key: query, value: node
         self.linked_list = LinkedList()
 
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, query):
+        return query in self.lookup
+
     def get(self, query):
         """Get the stored query result from the cache.
 
         Accessing a node updates its position to the front of the LRU list.
         """
-        node = self.lookup[query]
+        node = self.lookup.get(query)
         if node is None:
             return None
         self.linked_list.move_to_front(node)
         return node.results
 
-    def set(self, results, query):
+    def set(self, query, results):
         """Set the result for the given query key in the cache.
 
         When updating an entry, updates its position to the front of the LRU list.
         If the entry is new and the cache is at capacity, removes the oldest entry
         before the new entry is added.
         """
-        node = self.map[query]
+        node = self.lookup.get(query)
         if node is not None:
             # Key exists in cache, update the value
             node.results = results
@@ -80,11 +191,20 @@ class Cache(object):
             # Key does not exist in cache
             if self.size == self.MAX_SIZE:
                 # Remove the oldest entry from the linked list and lookup
-                self.lookup.pop(self.linked_list.tail.query, None)
-                self.linked_list.remove_from_tail()
+                oldest = self.linked_list.remove_from_tail()
+                del self.lookup[oldest.query]
             else:
                 self.size += 1
             # Add the new key and value
             new_node = Node(query, results)
             self.linked_list.append_to_front(new_node)
             self.lookup[query] = new_node
+
+    def footprint(self):
+        """Return the bytes spent on bookkeeping, excluding keys and results.
+
+        Counts the lookup table and every node; divide by `size` to get the
+        per-entry overhead of the cache tier.
+        """
+        return (sys.getsizeof(self.lookup) +
+                sys.getsizeof(self.linked_list.head) * (self.size + 2))
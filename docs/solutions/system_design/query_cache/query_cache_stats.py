@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Hit/miss/eviction counters, latency histograms and a miss-ratio curve.
+
+Instrumentation is a wrapper: a cache that is not wrapped in
+`InstrumentedCache` runs exactly the code it always did, so turning stats off
+costs nothing on the hot path.
+"""
+import time
+from collections import OrderedDict, deque
+
+
+class LatencyHistogram(object):
+    """Latencies in nanoseconds bucketed by powers of two."""
+
+    def __init__(self):
+        self.buckets = [0] * 64  # bucket i counts latencies in [2**(i-1), 2**i)
+        self.count = 0
+        self.total = 0
+
+    def record(self, nanoseconds):
+        self.buckets[nanoseconds.bit_length()] += 1
+        self.count += 1
+        self.total += nanoseconds
+
+    def percentile(self, percent):
+        """Return the upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return 0
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return 1 << index
+        return 1 << (len(self.buckets) - 1)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+
+class GhostCaches(object):
+    """Key-only LRU lists that estimate the hit ratio at other cache sizes.
+
+    Each candidate size keeps just the keys an LRU of that size would hold,
+    so it costs a fraction of a real cache and yields one point on the
+    miss-ratio curve.
+    """
+
+    def __init__(self, sizes):
+        self.lists = {size: OrderedDict() for size in sizes}
+        self.hits = dict.fromkeys(sizes, 0)
+        self.accesses = 0
+
+    def record(self, query):
+        self.accesses += 1
+        for size, keys in self.lists.items():
+            if query in keys:
+                self.hits[size] += 1
+                keys.move_to_end(query)
+            else:
+                keys[query] = None
+                if len(keys) > size:
+                    keys.popitem(last=False)
+
+    def hit_ratios(self):
+        """Return `{size: estimated hit ratio}` for every candidate size."""
+        return {size: hits / self.accesses if self.accesses else 0.0
+                for size, hits in self.hits.items()}
+
+
+class CacheStats(object):
+
+    def __init__(self, sample_interval=1.0, max_samples=3600):
+        self.hits = 0
+        self.misses = 0
+        self.inserts = 0
+        self.updates = 0
+        self.evictions = 0
+        self.rejections = 0
+        self.latency = {'get': LatencyHistogram(), 'set': LatencyHistogram()}
+        self.sample_interval = sample_interval
+        self.size_samples = deque(maxlen=max_samples)  # (timestamp, size)
+        self.next_sample = 0.0
+
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def sample_size(self, size, now):
+        if now >= self.next_sample:
+            self.size_samples.append((now, size))
+            self.next_sample = now + self.sample_interval
+
+    def as_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hit_ratio(),
+            'inserts': self.inserts,
+            'updates': self.updates,
+            'evictions': self.evictions,
+            'rejections': self.rejections,
+            'get_p50_ns': self.latency['get'].percentile(50),
+            'get_p99_ns': self.latency['get'].percentile(99),
+            'set_p50_ns': self.latency['set'].percentile(50),
+            'set_p99_ns': self.latency['set'].percentile(99),
+        }
+
+
+class InstrumentedCache(object):
+    """Wrap a cache and count what happens to it.
+
+    Works with any cache exposing `get(query)`, `set(query, results)` and a
+    `lookup` dict, such as `Cache`, `SizedCache` or `TtlCache`. Pass
+    `ghost_sizes` to estimate the hit ratio the cache would have at those
+    sizes, e.g. `(2 * MAX_SIZE,)` to ask what doubling it would buy.
+    """
+
+    def __init__(self, cache, stats=None, ghost_sizes=(),
+                 clock=time.perf_counter_ns, wall_clock=time.monotonic):
+        self.cache = cache
+        self.stats = stats or CacheStats()
+        self.ghosts = GhostCaches(ghost_sizes) if ghost_sizes else None
+        self.clock = clock
+        self.wall_clock = wall_clock
+
+    def __len__(self):
+        return len(self.cache.lookup)
+
+    def __contains__(self, query):
+        return query in self.cache.lookup
+
+    def get(self, query):
+        start = self.clock()
+        results = self.cache.get(query)
+        self.stats.latency['get'].record(self.clock() - start)
+        if results is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        if self.ghosts is not None:
+            self.ghosts.record(query)
+        return results
+
+    def set(self, query, results):
+        lookup = self.cache.lookup
+        exists = query in lookup
+        before = len(lookup)
+        start = self.clock()
+        self.cache.set(query, results)
+        self.stats.latency['set'].record(self.clock() - start)
+        after = len(lookup)
+        if exists:
+            self.stats.updates += 1
+        elif query in lookup:
+            self.stats.inserts += 1
+        else:
+            self.stats.rejections += 1
+        expected = before if exists or query not in lookup else before + 1
+        self.stats.evictions += max(0, expected - after)
+        self.stats.sample_size(after, self.wall_clock())
+
+    def miss_ratio_curve(self):
+        """Return `{size: estimated miss ratio}` including the current size."""
+        curve = {}
+        if self.ghosts is not None:
+            curve = {size: 1.0 - ratio
+                     for size, ratio in self.ghosts.hit_ratios().items()}
+        max_size = getattr(self.cache, 'MAX_SIZE', None)
+        if max_size is not None:
+            curve[max_size] = 1.0 - self.stats.hit_ratio()
+        return curve
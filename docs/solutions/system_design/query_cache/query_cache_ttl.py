@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .query_cache_snippets import Cache, Node, QueryApi
+
+
+class TtlNode(Node):
+
+    __slots__ = ('fresh_until', 'expires_at')
+
+    def __init__(self, query, results, fresh_until, expires_at):
+        super(TtlNode, self).__init__(query, results)
+        self.fresh_until = fresh_until
+        self.expires_at = expires_at
+
+
+class TtlCache(Cache):
+    """LRU cache whose entries expire after a time to live (TTL).
+
+    An entry is fresh for `ttl` seconds after it is set, then stale for a
+    further `stale_ttl` seconds, then expired. `get` only returns fresh
+    results; `get_stale` also returns stale ones so callers can serve them
+    while refreshing. Expired entries are dropped lazily: a min-heap ordered
+    by expiry time is drained on every `set`, so memory stays bounded even
+    for keys that are never read again.
+    """
+
+    def __init__(self, MAX_SIZE, ttl, stale_ttl=0, clock=time.monotonic):
+        super(TtlCache, self).__init__(MAX_SIZE)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.expiry_heap = []  # (expires_at, query), may hold outdated items
+
+    def get(self, query):
+        """Get the stored query result if it is still fresh."""
+        results, fresh = self.get_stale(query)
+        return results if fresh else None
+
+    def get_stale(self, query):
+        """Return `(results, fresh)`, or `(None, False)` if missing or expired.
+
+        Accessing a node updates its position to the front of the LRU list.
+        """
+        node = self.lookup.get(query)
+        if node is None:
+            return None, False
+        now = self.clock()
+        if now >= node.expires_at:
+            self._remove(node)
+            return None, False
+        self.linked_list.move_to_front(node)
+        return node.results, now < node.fresh_until
+
+    def set(self, query, results, ttl=None):
+        """Set the result for the given query key, fresh for `ttl` seconds.
+
+        Falls back to the cache-wide `ttl` when none is given. If the entry is
+        new and the cache is at capacity, the oldest entry is evicted.
+        """
+        now = self.clock()
+        self.purge_expired(now)
+        fresh_until = now + (self.ttl if ttl is None else ttl)
+        expires_at = fresh_until + self.stale_ttl
+        node = self.lookup.get(query)
+        if node is not None:
+            # Key exists in cache, update the value
+            node.results = results
+            node.fresh_until = fresh_until
+            node.expires_at = expires_at
+            self.linked_list.move_to_front(node)
+        else:
+            if self.size == self.MAX_SIZE:
+                self._remove(self.linked_list.tail.prev)
+            node = TtlNode(query, results, fresh_until, expires_at)
+            self.linked_list.append_to_front(node)
+            self.lookup[query] = node
+            self.size += 1
+        heapq.heappush(self.expiry_heap, (expires_at, query))
+        if len(self.expiry_heap) > 2 * self.size + 64:
+            self._compact_heap()
+
+    def purge_expired(self, now=None):
+        """Drop every entry whose expiry time has passed."""
+        if now is None:
+            now = self.clock()
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, query = heapq.heappop(heap)
+            node = self.lookup.get(query)
+            # Skip heap items left behind by updates and LRU evictions
+            if node is not None and node.expires_at == expires_at:
+                self._remove(node)
+
+    def _compact_heap(self):
+        self.expiry_heap = [(node.expires_at, query)
+                            for query, node in self.lookup.items()]
+        heapq.heapify(self.expiry_heap)
+
+    def _remove(self, node):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        del self.lookup[node.query]
+        self.size -= 1
+
+
+class StaleWhileRevalidateQueryApi(QueryApi):
+    """QueryApi that serves stale results while refreshing them in the background.
+
+    A fresh hit is returned as usual and a miss blocks on the reverse index.
+    A stale hit is returned immediately and one background refresh per query
+    is scheduled on `executor`, keeping latency flat while bounding staleness
+    to the cache's `stale_ttl`.
+    """
+
+    def __init__(self, memory_cache, reverse_index_cluster, executor=None):
+        super(StaleWhileRevalidateQueryApi, self).__init__(
+            memory_cache, reverse_index_cluster)
+        self.executor = executor or ThreadPoolExecutor(max_workers=4)
+        self.lock = threading.Lock()  # guards memory_cache and refreshing
+        self.refreshing = set()
+
+    def process_query(self, query):
+        query = self.parse_query(query)
+        with self.lock:
+            results, fresh = self.memory_cache.get_stale(query)
+            if results is not None and not fresh and query not in self.refreshing:
+                self.refreshing.add(query)
+                self.executor.submit(self._refresh, query)
+        if results is None:
+            results = self.reverse_index_cluster.process_search(query)
+            with self.lock:
+                self.memory_cache.set(query, results)
+        return results
+
+    def _refresh(self, query):
+        try:
+            results = self.reverse_index_cluster.process_search(query)
+            with self.lock:
+                self.memory_cache.set(query, results)
+        finally:
+            with self.lock:
+                self.refreshing.discard(query)
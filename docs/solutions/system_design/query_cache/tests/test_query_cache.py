@@ -0,0 +1,107 @@
+import pytest
+from query_cache.query_cache_snippets import QueryApi, Node, Cache
+
+
+class FakeReverseIndexCluster(object):
+
+    def __init__(self):
+        self.searches = []
+
+    def process_search(self, query):
+        self.searches.append(query)
+        return ['result for ' + query]
+
+
+class BatchReverseIndexCluster(FakeReverseIndexCluster):
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def process_searches(self, queries):
+        self.batches.append(queries)
+        return [self.process_search(query) for query in queries]
+
+
+class IdentityQueryApi(QueryApi):
+
+    def parse_query(self, query):
+        return query
+
+
+class TestCache():
+
+    def setup_method(self, method):
+        self.cache = Cache(MAX_SIZE=2)
+
+    def test_get_missing(self):
+        assert self.cache.get('foo') is None
+
+    def test_set_and_get(self):
+        self.cache.set('foo', ['a'])
+        assert self.cache.get('foo') == ['a']
+        self.cache.set('foo', ['b'])
+        assert self.cache.get('foo') == ['b']
+        assert len(self.cache) == 1
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('foo', ['a'])
+        self.cache.set('bar', ['b'])
+        self.cache.get('foo')
+        self.cache.set('baz', ['c'])
+        assert 'bar' not in self.cache
+        assert self.cache.get('foo') == ['a']
+        assert self.cache.get('baz') == ['c']
+        assert len(self.cache) == 2
+
+    def test_rejects_sizes_below_one(self):
+        for size in (0, -1):
+            with pytest.raises(ValueError):
+                Cache(MAX_SIZE=size)
+
+    def test_nodes_have_no_dict(self):
+        with pytest.raises(AttributeError):
+            Node('foo', ['a']).__dict__
+
+    def test_footprint_grows_with_entries(self):
+        empty = self.cache.footprint()
+        self.cache.set('foo', ['a'])
+        assert self.cache.footprint() > empty
+
+
+class TestQueryApi():
+
+    def setup_method(self, method):
+        self.cluster = FakeReverseIndexCluster()
+        self.api = IdentityQueryApi(Cache(MAX_SIZE=10), self.cluster)
+
+    def test_process_query_caches_results(self):
+        assert self.api.process_query('foo') == ['result for foo']
+        assert self.api.process_query('foo') == ['result for foo']
+        assert self.cluster.searches == ['foo']
+
+    def test_parse_query(self):
+        api = QueryApi(None, None, typos={'teh': 'the'})
+        assert api.parse_query('Teh <b>Quick</b> fox!') == 'the AND quick AND fox'
+        assert api.parse_query('cats or dogs -fleas') == 'cats OR dogs AND NOT fleas'
+        assert api.parse_query('x-ray &amp; and') == 'x AND ray'
+
+    def test_parse_query_is_memoized(self):
+        api = QueryApi(None, None)
+        api.parse_query('Foo Bar')
+        api.parse_query('Foo Bar')
+        assert api._parse_cached.cache_info().hits == 1
+
+    def test_process_queries_fans_out_misses(self):
+        self.api.process_query('foo')
+        results = self.api.process_queries(['foo', 'bar', 'baz', 'bar'])
+        assert results == [['result for foo'], ['result for bar'],
+                           ['result for baz'], ['result for bar']]
+        assert sorted(self.cluster.searches) == ['bar', 'baz', 'foo']
+        assert self.api.memory_cache.get('baz') == ['result for baz']
+
+    def test_process_queries_batches_misses(self):
+        cluster = BatchReverseIndexCluster()
+        api = IdentityQueryApi(Cache(MAX_SIZE=10), cluster)
+        api.process_queries(['foo', 'bar', 'foo'])
+        assert cluster.batches == [['foo', 'bar']]
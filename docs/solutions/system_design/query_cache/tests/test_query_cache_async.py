@@ -0,0 +1,40 @@
+import asyncio
+
+from query_cache.query_cache_async import AsyncCache, AsyncQueryApi, FakeReverseIndexCluster
+from query_cache.query_cache_snippets import Cache
+
+
+class SyncReverseIndexCluster(object):
+
+    def process_search(self, query):
+        return ['result for ' + query]
+
+
+class TestAsyncQueryApi():
+
+    def setup_method(self, method):
+        self.cluster = FakeReverseIndexCluster(latency=0.01,
+                                               results_per_query=1)
+        self.api = AsyncQueryApi(AsyncCache(Cache(MAX_SIZE=10)), self.cluster)
+
+    def test_process_query_caches_results(self):
+        async def run():
+            first = await self.api.process_query('foo')
+            second = await self.api.process_query('foo')
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first == second == ['foo result 0']
+        assert self.cluster.searches == 1
+
+    def test_concurrent_misses_share_one_search(self):
+        results = asyncio.run(self.api.process_queries(['foo'] * 50 + ['bar']))
+        assert results[0] == ['foo result 0']
+        assert results[-1] == ['bar result 0']
+        assert self.cluster.searches == 2
+        assert self.api.in_flight == {}
+
+    def test_blocking_cluster_runs_in_executor(self):
+        api = AsyncQueryApi(AsyncCache(Cache(MAX_SIZE=10)),
+                            SyncReverseIndexCluster())
+        assert asyncio.run(api.process_query('foo')) == ['result for foo']
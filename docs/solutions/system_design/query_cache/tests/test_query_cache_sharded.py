@@ -0,0 +1,37 @@
+import threading
+
+from query_cache.query_cache_sharded import ShardedCache
+
+
+class TestShardedCache():
+
+    def setup_method(self, method):
+        self.cache = ShardedCache(MAX_SIZE=64, num_shards=4)
+
+    def test_set_and_get(self):
+        self.cache.set('foo', ['a'])
+        assert self.cache.get('foo') == ['a']
+        assert self.cache.get('bar') is None
+
+    def test_bounded_size(self):
+        for i in range(1000):
+            self.cache.set('query %d' % i, [i])
+        assert len(self.cache) <= 64
+
+    def test_concurrent_access(self):
+        def worker(offset):
+            for i in range(2000):
+                query = 'query %d' % ((i + offset) % 100)
+                if self.cache.get(query) is None:
+                    self.cache.set(query, [query])
+
+        threads = [threading.Thread(target=worker, args=(n,))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(self.cache) <= 64
+        for shard in self.cache.shards:
+            cache = shard.cache
+            assert len(cache.lookup) == cache.size
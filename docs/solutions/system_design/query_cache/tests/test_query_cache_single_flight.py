@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+from query_cache.query_cache_sharded import ShardedCache
+from query_cache.query_cache_single_flight import SingleFlight, CoalescingQueryApi
+
+
+class SlowReverseIndexCluster(object):
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.searches = 0
+
+    def process_search(self, query):
+        self.searches += 1
+        self.release.wait(5)
+        if query == 'broken':
+            raise ValueError('index unavailable')
+        return ['result for ' + query]
+
+
+class IdentityQueryApi(CoalescingQueryApi):
+
+    def parse_query(self, query):
+        return query
+
+
+class TestCoalescingQueryApi():
+
+    def setup_method(self, method):
+        self.cluster = SlowReverseIndexCluster()
+        self.api = IdentityQueryApi(ShardedCache(MAX_SIZE=10), self.cluster)
+
+    def run_concurrently(self, query, num_threads=8):
+        outcomes = []
+
+        def worker():
+            try:
+                outcomes.append(self.api.process_query(query))
+            except Exception as error:
+                outcomes.append(error)
+
+        threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        while not self.api.single_flight.calls:
+            pass
+        self.cluster.release.set()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_misses_share_one_search(self):
+        outcomes = self.run_concurrently('foo')
+        assert outcomes == [['result for foo']] * 8
+        assert self.cluster.searches == 1
+
+    def test_errors_propagate_to_waiters(self):
+        outcomes = self.run_concurrently('broken')
+        assert len(outcomes) == 8
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+        assert self.api.single_flight.calls == {}
+
+
+class TestSingleFlight():
+
+    def test_waiter_times_out(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return 'done'
+
+        leader = threading.Thread(target=single_flight.do, args=('key', slow))
+        leader.start()
+        started.wait(5)
+        with pytest.raises(TimeoutError):
+            single_flight.do('key', slow, timeout=0.01)
+        release.set()
+        leader.join()
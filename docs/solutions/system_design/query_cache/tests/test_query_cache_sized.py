@@ -0,0 +1,44 @@
+from query_cache.query_cache_sized import SizedCache, TinyLfuAdmission
+
+
+def nbytes(results):
+    return len(results)
+
+
+class TestSizedCache():
+
+    def test_evicts_by_bytes(self):
+        cache = SizedCache(MAX_BYTES=10, size_estimator=nbytes)
+        cache.set('foo', 'a' * 4)
+        cache.set('bar', 'b' * 4)
+        cache.set('baz', 'c' * 4)
+        assert 'foo' not in cache
+        assert cache.nbytes == 8
+        cache.set('big', 'd' * 10)
+        assert len(cache) == 1
+        assert cache.nbytes == 10
+
+    def test_never_stores_oversized_results(self):
+        cache = SizedCache(MAX_BYTES=10, size_estimator=nbytes)
+        cache.set('foo', 'a' * 4)
+        cache.set('huge', 'b' * 11)
+        assert 'huge' not in cache
+        assert cache.get('foo') == 'a' * 4
+
+    def test_update_adjusts_bytes(self):
+        cache = SizedCache(MAX_BYTES=10, size_estimator=nbytes)
+        cache.set('foo', 'a' * 4)
+        cache.set('foo', 'a' * 6)
+        assert cache.nbytes == 6
+        assert len(cache) == 1
+
+    def test_admission_protects_hot_entries(self):
+        cache = SizedCache(MAX_BYTES=10, size_estimator=nbytes,
+                           admission=TinyLfuAdmission())
+        cache.set('hot', 'a' * 6)
+        for _ in range(5):
+            cache.get('hot')
+        cache.get('one-off')
+        cache.set('one-off', 'b' * 8)
+        assert 'one-off' not in cache
+        assert cache.get('hot') == 'a' * 6
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+from query_cache.query_cache_snapshot import Snapshot, WarmCache, dump_snapshot, load_snapshot
+from query_cache.query_cache_snippets import Cache
+
+
+class TestSnapshot():
+
+    def setup_method(self, method):
+        self.cache = Cache(MAX_SIZE=10)
+        self.cache.set('foo', ['a'])
+        self.cache.set('bar', ['b', 'c'])
+        self.cache.set('café', [{'title': 'x'}])
+        self.cache.get('foo')
+
+    def test_round_trip_preserves_lru_order(self, tmp_path):
+        path = str(tmp_path / 'cache.snap')
+        dump_snapshot(self.cache, path)
+        assert not os.path.exists(path + '.tmp')
+        restored = load_snapshot(Cache(MAX_SIZE=10), path)
+        assert restored.get('café') == [{'title': 'x'}]
+        node = restored.linked_list.tail.prev
+        assert [node.query, node.prev.query] == ['bar', 'foo']
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / 'not.snap'
+        path.write_bytes(b'\0' * 64)
+        with pytest.raises(ValueError):
+            Snapshot(str(path))
+
+    def test_warm_cache_promotes_lazily(self, tmp_path):
+        path = str(tmp_path / 'cache.snap')
+        dump_snapshot(self.cache, path)
+        snapshot = Snapshot(path)
+        cache = WarmCache(MAX_SIZE=10, snapshot=snapshot)
+        assert len(cache) == 0
+        assert cache.get('bar') == ['b', 'c']
+        assert len(cache) == 1
+        cache.set('foo', ['new'])
+        assert 'foo' not in snapshot
+        assert cache.get('missing') is None
+        snapshot.close()
@@ -0,0 +1,87 @@
+import os
+from importlib.util import module_from_spec, spec_from_file_location
+
+from query_cache.query_cache_sized import SizedCache
+from query_cache.query_cache_snippets import Cache
+from query_cache.query_cache_stats import InstrumentedCache, LatencyHistogram
+
+LRU_CACHE_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, os.pardir,
+    'object_oriented_design', 'lru_cache', 'lru_cache.py')
+
+
+def load_lru_cache():
+    # object_oriented_design is a separate test root, so load it by path
+    spec = spec_from_file_location('lru_cache_solution', LRU_CACHE_PATH)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestInstrumentedCache():
+
+    def setup_method(self, method):
+        self.cache = InstrumentedCache(Cache(MAX_SIZE=2), ghost_sizes=(4,))
+
+    def test_counts_operations(self):
+        self.cache.get('foo')
+        self.cache.set('foo', ['a'])
+        self.cache.get('foo')
+        self.cache.set('foo', ['b'])
+        self.cache.set('bar', ['c'])
+        self.cache.set('baz', ['d'])
+        stats = self.cache.stats.as_dict()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['inserts'] == 3
+        assert stats['updates'] == 1
+        assert stats['evictions'] == 1
+        assert stats['hit_ratio'] == 0.5
+        assert self.cache.stats.latency['set'].count == 4
+        assert len(self.cache.stats.size_samples) == 1
+
+    def test_counts_rejections(self):
+        cache = InstrumentedCache(SizedCache(MAX_BYTES=4, size_estimator=len))
+        cache.set('foo', 'abcde')
+        assert cache.stats.rejections == 1
+        assert cache.stats.evictions == 0
+
+    def test_miss_ratio_curve(self):
+        for _ in range(3):
+            for query in ('a', 'b', 'c'):
+                if self.cache.get(query) is None:
+                    self.cache.set(query, [query])
+        curve = self.cache.miss_ratio_curve()
+        assert curve[2] == 1.0
+        assert round(curve[4], 6) == round(3 / 9.0, 6)
+
+    def test_wraps_the_lru_cache_solution(self):
+        lru_cache = load_lru_cache()
+        cache = InstrumentedCache(lru_cache.Cache(MAX_SIZE=2),
+                                  ghost_sizes=(4,))
+        cache.set('foo', ['a'])
+        cache.set('bar', ['b'])
+        assert cache.get('foo') == ['a']
+        cache.set('foo', ['c'])
+        cache.set('baz', ['d'])
+        assert cache.get('bar') is None
+        assert cache.get('foo') == ['c']
+        assert 'baz' in cache
+        assert len(cache) == 2
+        stats = cache.stats.as_dict()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 1
+        assert stats['inserts'] == 3
+        assert stats['updates'] == 1
+        assert stats['evictions'] == 1
+        assert round(cache.miss_ratio_curve()[2], 6) == round(1 / 3.0, 6)
+
+
+class TestLatencyHistogram():
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for nanoseconds in [100] * 99 + [10000]:
+            histogram.record(nanoseconds)
+        assert histogram.percentile(50) == 128
+        assert histogram.percentile(100) == 16384
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from query_cache.query_cache_ttl import TtlCache, StaleWhileRevalidateQueryApi
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingReverseIndexCluster(object):
+
+    def __init__(self):
+        self.searches = 0
+
+    def process_search(self, query):
+        self.searches += 1
+        return ['%s v%d' % (query, self.searches)]
+
+
+class IdentityQueryApi(StaleWhileRevalidateQueryApi):
+
+    def parse_query(self, query):
+        return query
+
+
+class TestTtlCache():
+
+    def setup_method(self, method):
+        self.clock = FakeClock()
+        self.cache = TtlCache(MAX_SIZE=10, ttl=10, stale_ttl=5,
+                              clock=self.clock)
+
+    def test_entries_go_stale_then_expire(self):
+        self.cache.set('foo', ['a'])
+        assert self.cache.get('foo') == ['a']
+        self.clock.now = 12
+        assert self.cache.get('foo') is None
+        assert self.cache.get_stale('foo') == (['a'], False)
+        self.clock.now = 15
+        assert self.cache.get_stale('foo') == (None, False)
+        assert 'foo' not in self.cache
+
+    def test_per_entry_ttl(self):
+        self.cache.set('foo', ['a'], ttl=1)
+        self.cache.set('bar', ['b'])
+        self.clock.now = 2
+        assert self.cache.get('foo') is None
+        assert self.cache.get('bar') == ['b']
+
+    def test_set_purges_expired_entries(self):
+        for i in range(5):
+            self.cache.set('query %d' % i, [i], ttl=1)
+        self.clock.now = 7
+        self.cache.set('foo', ['a'])
+        assert len(self.cache) == 1
+        assert len(self.cache.expiry_heap) == 1
+
+
+class TestStaleWhileRevalidateQueryApi():
+
+    def setup_method(self, method):
+        self.clock = FakeClock()
+        self.cluster = CountingReverseIndexCluster()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        cache = TtlCache(MAX_SIZE=10, ttl=10, stale_ttl=60, clock=self.clock)
+        self.api = IdentityQueryApi(cache, self.cluster, self.executor)
+
+    def test_serves_stale_and_refreshes(self):
+        assert self.api.process_query('foo') == ['foo v1']
+        self.clock.now = 20
+        assert self.api.process_query('foo') == ['foo v1']
+        self.executor.shutdown(wait=True)
+        assert self.api.process_query('foo') == ['foo v2']
+        assert self.cluster.searches == 2
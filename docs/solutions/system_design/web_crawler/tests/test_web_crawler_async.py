@@ -0,0 +1,78 @@
+import asyncio
+
+from web_crawler.web_crawler_async import AsyncCrawler, AsyncFakeWeb, FakeWeb
+from web_crawler.web_crawler_benchmark import random_web
+from web_crawler.web_crawler_snippets import Crawler, PagesDataStore
+
+
+def data_store(crawl_delay=0):
+    data_store = PagesDataStore(None, crawl_delay=crawl_delay)
+    data_store.add_link_to_crawl('http://host0.example/page0')
+    return data_store
+
+
+class RecordingQueue(object):
+
+    def __init__(self):
+        self.pages = []
+
+    def generate(self, page):
+        self.pages.append(page.url)
+
+
+class FlakyWeb(AsyncFakeWeb):
+
+    async def fetch(self, url):
+        if url.endswith('page3'):
+            raise ConnectionError('reset by peer')
+        return await super(FlakyWeb, self).fetch(url)
+
+
+class TestAsyncCrawler():
+
+    def setup_method(self, method):
+        self.web_pages = random_web(num_pages=200, num_hosts=5)
+        self.web_pages['http://host0.example/page0'][1].append(
+            'http://host0.example/missing')
+        self.queue = RecordingQueue()
+
+    def crawl(self, web, **kwargs):
+        crawler = AsyncCrawler(web, data_store(), self.queue, RecordingQueue(),
+                               **kwargs)
+        asyncio.run(crawler.crawl())
+        return crawler
+
+    def test_crawls_every_reachable_page_once(self):
+        web = AsyncFakeWeb(self.web_pages, latency=0.001)
+        self.crawl(web, max_in_flight=16, max_per_host=2)
+        assert sorted(self.queue.pages) == sorted(self.web_pages)
+        assert web.fetches == len(self.web_pages) + 1
+        assert max(web.peak_in_flight.values()) == 2
+
+    def test_failed_fetches_are_dropped(self):
+        web = FlakyWeb(self.web_pages)
+        self.crawl(web, max_in_flight=4)
+        assert 'http://host3.example/page3' not in self.queue.pages
+        assert len(self.queue.pages) > 1
+
+    def test_matches_serial_crawler(self):
+        self.crawl(AsyncFakeWeb(self.web_pages), max_in_flight=1)
+        serial_queue = RecordingQueue()
+        crawler = Crawler(FakeWeb(self.web_pages), data_store(),
+                          serial_queue, RecordingQueue())
+        crawler.crawl()
+        assert serial_queue.pages == self.queue.pages
+
+    def test_respects_crawl_delay(self):
+        web_pages = random_web(num_pages=6, num_hosts=2, links_per_page=5)
+        web = AsyncFakeWeb(web_pages)
+        crawler = AsyncCrawler(web, data_store(crawl_delay=0.02),
+                               self.queue, RecordingQueue())
+        loop = asyncio.new_event_loop()
+        start = loop.time()
+        loop.run_until_complete(crawler.crawl())
+        elapsed = loop.time() - start
+        loop.close()
+        assert len(self.queue.pages) == 6
+        # three pages per host, two waits of the crawl delay on each
+        assert elapsed >= 0.04
@@ -0,0 +1,44 @@
+import os
+import random
+import tempfile
+from collections import Counter
+
+from web_crawler.web_crawler_dedup import dedup_urls, normalize_url
+
+
+class TestNormalizeUrl():
+
+    def test_normalizes_spellings_of_one_url(self):
+        assert normalize_url('HTTP://Example.COM:80/a?b=2&a=1#top\n') == (
+            'http://example.com/a?a=1&b=2')
+        assert normalize_url('https://example.com:443') == (
+            'https://example.com/')
+        assert normalize_url('http://example.com:8080/A') == (
+            'http://example.com:8080/A')
+        assert normalize_url('http://User@[::1]:80/') == (
+            'http://User@[::1]/')
+        assert normalize_url('  \n') == ''
+
+
+class TestDedupUrls():
+
+    def setup_method(self, method):
+        rng = random.Random(0)
+        self.lines = ['http://host%d.example/page%d\n' % (i % 7, i)
+                      for i in range(300)]
+        self.lines += rng.choices(self.lines, k=700)
+        self.lines += ['HTTP://HOST0.EXAMPLE:80/page0#top\n', '\n']
+        rng.shuffle(self.lines)
+        self.expected = Counter(filter(None, map(normalize_url, self.lines)))
+
+    def test_keeps_one_copy_of_each_url(self):
+        assert dict(dedup_urls(self.lines)) == self.expected
+        assert len(list(dedup_urls(self.lines))) == 300
+
+    def test_spills_to_disk_with_bounded_memory(self):
+        tmp_dir = tempfile.mkdtemp()
+        result = list(dedup_urls(self.lines, max_in_memory=20,
+                                 num_partitions=4, tmp_dir=tmp_dir))
+        assert len(result) == 300
+        assert dict(result) == self.expected
+        assert os.listdir(tmp_dir) == []
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import random
+import tempfile
+
+import pytest
+
+from web_crawler.web_crawler_async import AsyncCrawler, AsyncFakeWeb, FakeWeb
+from web_crawler.web_crawler_benchmark import (NullQueue, random_text,
+                                               random_web)
+from web_crawler.web_crawler_filters import (BloomFilter, CuckooFilter,
+                                             ScalableBloomFilter)
+from web_crawler.web_crawler_snippets import Crawler, PagesDataStore
+
+
+def urls(start, stop):
+    return ['http://example.com/page%d' % i for i in range(start, stop)]
+
+
+def false_positive_rate(seen, num_probes=20000):
+    return sum(url in seen for url in urls(10 ** 6,
+                                           10 ** 6 + num_probes)) / num_probes
+
+
+class TestFilters():
+
+    def setup_method(self, method):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    @pytest.mark.parametrize('factory', [
+        lambda: BloomFilter(5000, 0.01),
+        lambda: ScalableBloomFilter(500, 0.01),
+        lambda: CuckooFilter(5000, 0.01),
+    ])
+    def test_no_false_negatives_and_bounded_false_positives(self, factory):
+        seen = factory()
+        # A new url is only reported as seen when it is a false positive
+        assert sum(map(seen.add, urls(0, 5000))) > 4900
+        assert not any(seen.add(url) for url in urls(0, 5000))
+        assert all(url in seen for url in urls(0, 5000))
+        assert false_positive_rate(seen) < 0.02
+
+    def test_bloom_false_positive_rate_is_configurable(self):
+        seen = BloomFilter(5000, 0.001)
+        for url in urls(0, 5000):
+            seen.add(url)
+        assert false_positive_rate(seen) < 0.002
+        assert seen.nbytes < 2 * 5000
+
+    @pytest.mark.parametrize('cls', [BloomFilter, CuckooFilter])
+    def test_save_and_open(self, cls):
+        path = os.path.join(self.tmp_dir, 'seen')
+        seen = cls(1000)
+        for url in urls(0, 500):
+            seen.add(url)
+        seen.save(path)
+        with cls.open(path) as mapped:
+            assert all(url in mapped for url in urls(0, 500))
+            mapped.add('http://example.com/new')
+        with cls.open(path, readonly=True) as mapped:
+            assert len(mapped) == 501
+            assert 'http://example.com/new' in mapped
+
+    def test_cuckoo_remove(self):
+        seen = CuckooFilter(1000)
+        for url in urls(0, 500):
+            seen.add(url)
+        for url in urls(0, 250):
+            seen.remove(url)
+        assert len(seen) == 250
+        assert all(url in seen for url in urls(250, 500))
+        assert sum(url in seen for url in urls(0, 250)) < 5
+        with pytest.raises(KeyError):
+            seen.remove('http://example.com/missing')
+
+    def test_cuckoo_full_keeps_contents(self):
+        seen = CuckooFilter(100)
+        added = []
+        with pytest.raises(IndexError):
+            for url in urls(0, 1000):
+                seen.add(url)
+                added.append(url)
+        assert len(seen) == len(added)
+        assert all(url in seen for url in added)
+
+
+class TestSeenFilter():
+
+    def test_crawl_with_seen_filter(self):
+        web_pages = random_web(num_pages=200, num_hosts=5)
+        data_store = PagesDataStore(None, crawl_delay=0,
+                                    seen=BloomFilter(1000, 0.001))
+        data_store.add_link_to_crawl('http://host0.example/page0')
+        web = AsyncFakeWeb(web_pages)
+        asyncio.run(AsyncCrawler(web, data_store, NullQueue(),
+                                 NullQueue()).crawl())
+        assert web.fetches == len(web_pages)
+        assert len(data_store.signatures) == len(web_pages)
+        assert data_store.urls.id_of('http://host0.example/page0') is None
+        assert len(data_store.urls) == 0
+        assert len(data_store.urls.host_ids) < len(web_pages) / 2
+
+    def test_full_filter_still_stops_recrawls(self):
+        rng = random.Random(0)
+        ring = ['http://host%d.example/page%d' % (i % 3, i) for i in range(60)]
+        web_pages = {url: (random_text(rng), [ring[i - 1],
+                                              ring[(i + 1) % len(ring)]])
+                     for i, url in enumerate(ring)}
+        data_store = PagesDataStore(None, crawl_delay=0,
+                                    seen=CuckooFilter(8))
+        data_store.add_link_to_crawl(ring[0])
+        web = FakeWeb(web_pages)
+        Crawler(web, data_store, NullQueue(), NullQueue()).crawl()
+        assert web.fetches == len(ring)
+        assert data_store.seen_overflow
@@ -0,0 +1,193 @@
+import random
+import tracemalloc
+
+from web_crawler.web_crawler_frontier import Frontier, IndexedHeap, UrlTable
+from web_crawler.web_crawler_snippets import PagesDataStore
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestUrlTable():
+
+    def test_interns_urls(self):
+        urls = UrlTable()
+        foo = urls.add('http://Example.com/foo')
+        assert urls.add('http://Example.com/foo') == foo
+        bar = urls.add('http://example.com/bar')
+        assert urls.url(bar) == 'http://example.com/bar'
+        assert urls.host_id(foo) == urls.host_id(bar)
+        assert urls.id_of('http://example.com/baz') is None
+        assert len(urls) == 2
+
+    def test_discard_reuses_ids_and_compacts_the_arena(self):
+        urls = UrlTable()
+        for i in range(1000):
+            url_id = urls.add('http://example.com/%d' % i)
+            if i >= 10:
+                urls.discard(urls.id_of('http://example.com/%d' % (i - 10)))
+        assert len(urls) == 10
+        assert len(urls.host_ids) == 11
+        assert len(urls.arena) < 1000
+        assert urls.url(url_id) == 'http://example.com/999'
+        assert urls.id_of('http://example.com/990') is not None
+        assert urls.id_of('http://example.com/0') is None
+
+    def test_lookups_survive_random_discards(self):
+        rng = random.Random(0)
+        urls = UrlTable()
+        live = {}
+        for _ in range(5000):
+            url = 'http://example.com/%d' % rng.randrange(300)
+            if url in live and rng.random() < 0.5:
+                urls.discard(live.pop(url))
+            else:
+                live[url] = urls.add(url)
+        assert len(urls) == len(live)
+        for i in range(300):
+            url = 'http://example.com/%d' % i
+            assert urls.id_of(url) == live.get(url)
+
+    def test_uses_less_memory_than_a_set_of_urls(self):
+        def bytes_per_url(structure, num_urls=20000):
+            tracemalloc.start()
+            urls = structure()
+            for i in range(num_urls):
+                urls.add('http://host%d.example/path/page%d.html' % (
+                    i % 1000, i))
+            nbytes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return nbytes / num_urls
+
+        assert bytes_per_url(UrlTable) < 0.8 * bytes_per_url(set)
+
+
+class TestIndexedHeap():
+
+    def test_pops_in_priority_order_after_updates(self):
+        rng = random.Random(0)
+        heap = IndexedHeap()
+        priorities = {}
+        for item_id in range(200):
+            priorities[item_id] = rng.random()
+            heap.push(item_id, priorities[item_id])
+        for item_id in range(0, 200, 3):
+            priorities[item_id] = rng.random()
+            heap.update(item_id, priorities[item_id])
+        for item_id in range(1, 200, 7):
+            heap.remove(item_id)
+            del priorities[item_id]
+        popped = [heap.pop() for _ in range(len(heap))]
+        assert popped == sorted(priorities, key=priorities.get, reverse=True)
+
+
+class TestFrontier():
+
+    def setup_method(self, method):
+        self.urls = UrlTable()
+        self.frontier = Frontier(self.urls, crawl_delay=10,
+                                 crawl_delays={'slow.com': 30})
+
+    def push(self, url, priority):
+        url_id = self.urls.add(url)
+        self.frontier.push(url_id, priority)
+        return url_id
+
+    def pop_url(self, now):
+        url_id = self.frontier.pop(now)
+        return None if url_id is None else self.urls.url(url_id)
+
+    def test_best_ready_host_first_then_per_host_delays(self):
+        self.push('http://a.com/1', 5)
+        self.push('http://a.com/2', 4)
+        self.push('http://slow.com/1', 3)
+        self.push('http://slow.com/2', 2)
+        assert self.pop_url(0) == 'http://a.com/1'
+        assert self.pop_url(0) == 'http://slow.com/1'
+        assert self.pop_url(0) is None
+        assert self.frontier.next_ready_time() == 10
+        assert self.pop_url(10) == 'http://a.com/2'
+        assert self.frontier.next_ready_time() == 30
+        assert self.pop_url(29) is None
+        assert self.pop_url(30) == 'http://slow.com/2'
+        assert len(self.frontier) == 0
+        assert self.frontier.next_ready_time() is None
+
+    def test_cooling_host_urls_stay_queued_by_priority(self):
+        first = self.push('http://a.com/1', 3)
+        second = self.push('http://a.com/2', 2)
+        third = self.push('http://a.com/3', 1)
+        assert self.frontier.pop(0) == first
+        assert self.frontier.pop(1) is None
+        assert second in self.frontier and third in self.frontier
+        self.frontier.remove(second)
+        self.frontier.update(third, 50)
+        fourth = self.push('http://a.com/4', 100)
+        assert second not in self.frontier
+        assert self.frontier.pop(10) == fourth
+        assert self.frontier.pop(20) == third
+        assert self.frontier.pop(30) is None
+        assert self.frontier.next_ready_time() is None
+
+
+class TestPagesDataStore():
+
+    def setup_method(self, method):
+        self.clock = FakeClock()
+        self.data_store = PagesDataStore(None, crawl_delay=10,
+                                         clock=self.clock,
+                                         sleep=self.clock.sleep)
+
+    def test_priority_order_and_politeness(self):
+        self.data_store.add_link_to_crawl('http://a.com/1')
+        self.data_store.add_link_to_crawl('http://a.com/2', priority=5)
+        self.data_store.add_link_to_crawl('http://b.com/1', priority=3)
+        self.data_store.add_link_to_crawl('http://b.com/1')
+        extract = self.data_store.extract_max_priority_page
+        assert extract() == 'http://a.com/2'
+        assert extract() == 'http://b.com/1'
+        assert extract(wait=False) is None
+        assert self.data_store.ready_delay() == 10
+        assert extract() == 'http://a.com/1'
+        assert self.clock.now == 10
+        assert extract() is None
+
+    def test_reduce_priority_and_remove(self):
+        self.data_store.add_link_to_crawl('http://a.com/1', priority=4)
+        self.data_store.add_link_to_crawl('http://b.com/1', priority=3)
+        self.data_store.add_link_to_crawl('http://c.com/1', priority=1)
+        self.data_store.reduce_priority_link_to_crawl('http://a.com/1')
+        self.data_store.remove_link_to_crawl('http://b.com/1')
+        extract = self.data_store.extract_max_priority_page
+        assert [extract(), extract(), extract()] == [
+            'http://a.com/1', 'http://c.com/1', None]
+
+    def test_remove_and_boost_after_cooling_host_pop(self):
+        for i in range(4):
+            self.data_store.add_link_to_crawl('http://a.com/%d' % i)
+        extract = self.data_store.extract_max_priority_page
+        assert extract(wait=False) == 'http://a.com/0'
+        assert extract(wait=False) is None
+        self.data_store.remove_link_to_crawl('http://a.com/1')
+        self.data_store.add_link_to_crawl('http://a.com/3', priority=10)
+        self.data_store.add_link_to_crawl('http://a.com/new', priority=100)
+        assert [extract(), extract(), extract(), extract()] == [
+            'http://a.com/new', 'http://a.com/3', 'http://a.com/2', None]
+
+    def test_crawled_links_are_not_requeued(self):
+        self.data_store.add_link_to_crawl('http://a.com/1')
+        url = self.data_store.extract_max_priority_page()
+        self.data_store.insert_crawled_link(url, 0b1011)
+        self.data_store.add_link_to_crawl('http://a.com/1')
+        assert self.data_store.extract_max_priority_page() is None
+        assert self.data_store.crawled_similar(0b1010)
+        assert not self.data_store.crawled_similar(None)
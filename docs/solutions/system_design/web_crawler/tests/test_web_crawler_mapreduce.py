@@ -0,0 +1,47 @@
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip('mrjob')
+
+from web_crawler.web_crawler_mapreduce import RemoveDuplicateUrls  # noqa: E402
+
+
+class TestRemoveDuplicateUrls():
+
+    def setup_method(self, method):
+        self.job = RemoveDuplicateUrls(args=[])
+        self.job.mapper_init()
+
+    def map(self, lines):
+        url_counts = []
+        for line in lines:
+            url_counts.extend(self.job.mapper(None, line))
+        return url_counts + list(self.job.mapper_final())
+
+    def test_mapper_counts_normalised_urls(self):
+        assert self.map(['HTTP://Example.com:80/a#top',
+                         'http://example.com/a', '  ',
+                         'http://example.com/b?y=2&x=1']) == [
+            ('http://example.com/a', 2), ('http://example.com/b?x=1&y=2', 1)]
+
+    def test_mapper_emits_counts_when_full(self):
+        self.job.MAX_MAPPER_URLS = 2
+        assert self.map(['http://a.com/', 'http://b.com/',
+                         'http://a.com/']) == [
+            ('http://a.com/', 1), ('http://b.com/', 1), ('http://a.com/', 1)]
+
+    def test_combiner_and_reducer_sum_counts(self):
+        assert list(self.job.combiner('http://a.com/', iter([1, 2]))) == [
+            ('http://a.com/', 3)]
+        assert list(self.job.reducer('http://a.com/', iter([3, 4]))) == [
+            ('http://a.com/', 7)]
+
+    def test_runs_inline(self):
+        job = RemoveDuplicateUrls(['-r', 'inline', '--no-conf', '-'])
+        job.sandbox(stdin=BytesIO(b'http://a.com/x\nHTTP://A.com/x\n'
+                                  b'http://b.com/\n'))
+        with job.make_runner() as runner:
+            runner.run()
+            assert sorted(job.parse_output(runner.cat_output())) == [
+                ('http://a.com/x', 2), ('http://b.com/', 1)]
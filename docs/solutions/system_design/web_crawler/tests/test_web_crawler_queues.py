@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from web_crawler.web_crawler_async import AsyncCrawler, AsyncFakeWeb, FakeWeb
+from web_crawler.web_crawler_benchmark import NullQueue, random_web
+from web_crawler.web_crawler_queues import BatchingQueue, InMemoryQueue
+from web_crawler.web_crawler_snippets import Crawler, Page, PagesDataStore
+
+
+def pages(count, contents='contents'):
+    return [Page('http://example.com/%d' % i, contents, [])
+            for i in range(count)]
+
+
+class BlockedQueue(InMemoryQueue):
+
+    def __init__(self):
+        super(BlockedQueue, self).__init__()
+        self.unblocked = threading.Event()
+
+    def generate_many(self, pages):
+        self.unblocked.wait()
+        super(BlockedQueue, self).generate_many(pages)
+
+
+class FailingQueue(object):
+
+    def __init__(self, failures=float('inf')):
+        self.failures = failures
+        self.pages = []
+
+    def generate(self, page):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('indexer unavailable')
+        self.pages.append(page)
+
+
+class TestBatchingQueue():
+
+    def test_flushes_full_batches_by_count(self):
+        queue = InMemoryQueue()
+        with BatchingQueue(queue, max_batch=10, max_delay=60) as batching:
+            for page in pages(35):
+                batching.generate(page)
+        assert len(queue.pages) == 35
+        assert queue.round_trips == 4
+
+    def test_flushes_by_bytes(self):
+        queue = InMemoryQueue()
+        with BatchingQueue(queue, max_batch_bytes=250,
+                           max_delay=60) as batching:
+            for page in pages(20, contents='x' * 100):
+                batching.generate(page)
+        assert len(queue.pages) == 20
+        assert queue.round_trips == 7
+
+    def test_flushes_by_time(self):
+        queue = InMemoryQueue()
+        batching = BatchingQueue(queue, max_delay=0.01)
+        for page in pages(3):
+            batching.generate(page)
+        deadline = time.monotonic() + 5
+        while len(queue.pages) < 3 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert len(queue.pages) == 3
+        assert queue.round_trips == 1
+        batching.close()
+
+    def test_back_pressure_when_full(self):
+        queue = BlockedQueue()
+        batching = BatchingQueue(queue, max_batch=2, max_pending=4,
+                                 max_delay=0)
+        for page in pages(6):
+            batching.generate(page, timeout=1)
+        with pytest.raises(IndexError):
+            batching.generate(pages(1)[0], timeout=0.05)
+        queue.unblocked.set()
+        batching.generate(pages(1)[0], timeout=1)
+        batching.close()
+        assert len(queue.pages) == 7
+
+    def test_queue_errors_are_raised(self):
+        batching = BatchingQueue(FailingQueue(), max_retries=2,
+                                 retry_delay=0)
+        page = pages(1)[0]
+        batching.generate(page)
+        with pytest.raises(ConnectionError):
+            batching.flush()
+        assert batching.undelivered() == [page]
+        with pytest.raises(ConnectionError):
+            batching.close()
+        assert batching.undelivered() == [page]
+        with pytest.raises(ValueError):
+            batching.generate(page)
+
+    def test_failed_batches_are_retried(self):
+        queue = FailingQueue(failures=1)
+        with BatchingQueue(queue, max_batch=4, max_delay=60,
+                           retry_delay=0) as batching:
+            for page in pages(10):
+                batching.generate(page)
+        assert [page.url for page in queue.pages] == [
+            page.url for page in pages(10)]
+        assert batching.undelivered() == []
+
+    def test_sending_resumes_after_an_error_is_raised(self):
+        queue = FailingQueue(failures=3)
+        batching = BatchingQueue(queue, max_retries=1, retry_delay=0)
+        for page in pages(3):
+            batching.generate(page)
+        with pytest.raises(ConnectionError):
+            batching.flush()
+        assert len(batching.undelivered()) == 3
+        batching.close()
+        assert len(queue.pages) == 3
+
+
+class TestBatchedCrawler():
+
+    def test_crawl_with_batching_queues(self):
+        web_pages = random_web(num_pages=100, num_hosts=5)
+        data_store = PagesDataStore(None, crawl_delay=0)
+        data_store.add_link_to_crawl('http://host0.example/page0')
+        reverse_index_queue, doc_index_queue = InMemoryQueue(), InMemoryQueue()
+        with BatchingQueue(reverse_index_queue, max_batch=16) as reverse_batch:
+            with BatchingQueue(doc_index_queue, max_batch=16) as doc_batch:
+                Crawler(FakeWeb(web_pages), data_store, reverse_batch,
+                        doc_batch).crawl()
+        for queue in (reverse_index_queue, doc_index_queue):
+            assert sorted(page.url for page in queue.pages) == sorted(
+                web_pages)
+            assert queue.round_trips < len(web_pages)
+
+    def test_full_queue_does_not_block_the_event_loop(self):
+        web_pages = random_web(num_pages=50, num_hosts=5)
+        data_store = PagesDataStore(None, crawl_delay=0)
+        data_store.add_link_to_crawl('http://host0.example/page0')
+        queue = BlockedQueue()
+        # Only a coroutine on the loop unblocks the indexer; the timer just
+        # ends the test if the loop is stuck
+        timer = threading.Timer(5, queue.unblocked.set)
+        timer.start()
+        batching = BatchingQueue(queue, max_batch=1, max_pending=2,
+                                 max_delay=0)
+
+        async def crawl():
+            crawler = AsyncCrawler(AsyncFakeWeb(web_pages, latency=0.001),
+                                   data_store, batching, NullQueue())
+            task = asyncio.ensure_future(crawler.crawl())
+            await asyncio.sleep(0.1)
+            assert len(batching.undelivered()) == batching.max_pending
+            queue.unblocked.set()
+            await task
+
+        start = time.monotonic()
+        asyncio.run(crawl())
+        elapsed = time.monotonic() - start
+        timer.cancel()
+        batching.close()
+        assert elapsed < 2
+        assert len(queue.pages) == len(web_pages)
@@ -0,0 +1,57 @@
+import random
+
+from web_crawler.web_crawler_benchmark import random_text
+from web_crawler.web_crawler_simhash import (SimHashIndex, hamming_distance,
+                                             simhash)
+from web_crawler.web_crawler_snippets import Page
+
+
+class TestSimHash():
+
+    def setup_method(self, method):
+        self.rng = random.Random(0)
+
+    def test_near_duplicates_are_close(self):
+        close = 0
+        for _ in range(20):
+            words = random_text(self.rng, num_words=2000).split()
+            text = ' '.join(words)
+            words[1000] = 'edited'
+            close += hamming_distance(simhash(text),
+                                      simhash(' '.join(words))) <= 3
+        assert close >= 18
+        assert simhash(text) == simhash(text.upper())
+
+    def test_unrelated_pages_are_far(self):
+        text = random_text(self.rng, num_words=500)
+        other = random_text(self.rng, num_words=500)
+        assert hamming_distance(simhash(text), simhash(other)) > 10
+
+    def test_page_signature(self):
+        assert Page('http://a.com', '', []).signature is None
+        assert (Page('http://a.com', 'a b', []).signature ==
+                Page('http://b.com', 'a b', []).signature)
+
+
+class TestSimHashIndex():
+
+    def setup_method(self, method):
+        self.rng = random.Random(0)
+
+    def flip(self, fingerprint, num_bits):
+        for bit in self.rng.sample(range(64), num_bits):
+            fingerprint ^= 1 << bit
+        return fingerprint
+
+    def test_finds_exactly_the_fingerprints_within_distance(self):
+        for blocks in (None, 6):
+            index = SimHashIndex(distance=3, blocks=blocks)
+            fingerprints = [self.rng.getrandbits(64) for _ in range(500)]
+            for fingerprint in fingerprints:
+                index.add(fingerprint)
+            assert len(index) == 500
+            for fingerprint in fingerprints[:100]:
+                for num_bits in range(4):
+                    near = self.flip(fingerprint, num_bits)
+                    assert index.find(near) == fingerprint
+                assert self.flip(fingerprint, 8) not in index
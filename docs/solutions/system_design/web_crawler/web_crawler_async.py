@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+
+from .web_crawler_snippets import Crawler, Page
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+class FakeWeb(object):
+    """In-process stand-in for the web, serving pages from a dict.
+
+    `pages` maps a url to `(contents, child_urls)`; any other url is a 404
+    and fetches as None. `latency` is seconds per fetch, or a callable taking
+    the url. Tracks the peak number of concurrent fetches per host.
+    """
+
+    def __init__(self, pages, latency=0.0):
+        self.pages = pages
+        self.latency = latency if callable(latency) else lambda url: latency
+        self.fetches = 0
+        self.in_flight = Counter()  # key: host, value: fetches in progress
+        self.peak_in_flight = Counter()
+
+    def _start(self, url):
+        host = host_of(url)
+        self.fetches += 1
+        self.in_flight[host] += 1
+        self.peak_in_flight[host] = max(self.peak_in_flight[host],
+                                        self.in_flight[host])
+        return host
+
+    def _page(self, url):
+        entry = self.pages.get(url)
+        if entry is None:
+            return None
+        contents, child_urls = entry
+        return Page(url, contents, child_urls)
+
+    def fetch(self, url):
+        host = self._start(url)
+        try:
+            time.sleep(self.latency(url))
+        finally:
+            self.in_flight[host] -= 1
+        return self._page(url)
+
+
+class AsyncFakeWeb(FakeWeb):
+    """`FakeWeb` whose fetches are coroutines that sleep on the event loop."""
+
+    async def fetch(self, url):
+        host = self._start(url)
+        try:
+            await asyncio.sleep(self.latency(url))
+        finally:
+            self.in_flight[host] -= 1
+        return self._page(url)
+
+
+class AsyncCrawler(Crawler):
+    """Crawler that keeps up to `max_in_flight` fetches going at once.
+
+    `pages` is a fetcher whose `fetch(url)` is a coroutine, e.g. an HTTP
+    client or `AsyncFakeWeb`. At most `max_per_host` fetches run against any
+    one host, on top of the data store's per-host crawl delay. Frontier
+    calls stay synchronous, as they are in-memory. Index queues with an
+    `agenerate` coroutine, like `BatchingQueue`, are awaited, so a full
+    queue holds back only the worker that feeds it, not the whole loop.
+    """
+
+    def __init__(self, pages, data_store, reverse_index_queue, doc_index_queue,
+                 max_in_flight=64, max_per_host=4):
+        super(AsyncCrawler, self).__init__(pages, data_store,
+                                           reverse_index_queue,
+                                           doc_index_queue)
+        self.max_in_flight = max_in_flight
+        self.max_per_host = max_per_host
+
+    async def crawl(self):
+        self.host_limits = defaultdict(
+            lambda: asyncio.Semaphore(self.max_per_host))
+        self.active = 0
+        self.progress = asyncio.Event()
+        await asyncio.gather(*[self._worker()
+                               for _ in range(self.max_in_flight)])
+
+    async def _worker(self):
+        while True:
+            url = self.data_store.extract_max_priority_page(wait=False)
+            if url is None:
+                delay = self.data_store.ready_delay()
+                if delay is None and not self.active:
+                    # Nothing queued and nothing in flight to queue more
+                    self.progress.set()
+                    return
+                # Wait for a fetch to add links or for a host to cool down
+                self.progress.clear()
+                try:
+                    await asyncio.wait_for(self.progress.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.active += 1
+            try:
+                async with self.host_limits[host_of(url)]:
+                    try:
+                        page = await self.pages.fetch(url)
+                    except Exception:
+                        page = None  # treated like a 404, the link is dropped
+                await self._process_page(url, page)
+            finally:
+                self.active -= 1
+                self.progress.set()
+
+    async def _process_page(self, url, page):
+        """`process_page`, awaiting room in the index queues."""
+        if page is None or self.data_store.crawled_similar(page.signature):
+            self.process_page(url, page)
+            return
+        # Record the page before awaiting, so other workers see it crawled
+        for child_url in page.child_urls:
+            self.data_store.add_link_to_crawl(child_url)
+        self.data_store.remove_link_to_crawl(page.url)
+        self.data_store.insert_crawled_link(page.url, page.signature)
+        for queue in (self.reverse_index_queue, self.doc_index_queue):
+            agenerate = getattr(queue, 'agenerate', None)
+            if agenerate is not None:
+                await agenerate(page)
+            else:
+                queue.generate(page)
@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""Crawler throughput benchmarks.
+
+Run from `docs/solutions/system_design`:
+
+    python -m web_crawler.web_crawler_benchmark
+
+`bench_crawl` is the end-to-end check for crawler changes: it crawls a
+synthetic power-law web and breaks the time down by stage.
+"""
+import asyncio
+import math
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from itertools import accumulate
+
+from .web_crawler_async import AsyncCrawler, AsyncFakeWeb, FakeWeb
+from .web_crawler_filters import BloomFilter, CuckooFilter, ScalableBloomFilter
+from .web_crawler_frontier import UrlTable
+from .web_crawler_queues import BatchingQueue, InMemoryQueue
+from .web_crawler_simhash import SimHashIndex, hamming_distance, simhash
+from .web_crawler_snippets import Crawler, PagesDataStore
+
+
+class NullQueue(object):
+
+    def generate(self, page):
+        pass
+
+
+def random_text(rng, num_words=50):
+    return ' '.join('w%d' % rng.randrange(5000) for _ in range(num_words))
+
+
+def random_web(num_pages, num_hosts, links_per_page=8, seed=0):
+    """Return `{url: (contents, child_urls)}` for a random link graph."""
+    rng = random.Random(seed)
+    urls = ['http://host%d.example/page%d' % (i % num_hosts, i)
+            for i in range(num_pages)]
+    links = [rng.sample(urls, links_per_page) for _ in urls]
+    return {url: (random_text(rng), child_urls)
+            for url, child_urls in zip(urls, links)}
+
+
+def power_law_web(num_pages, num_hosts=100, links_per_page=8,
+                  mean_words=300, duplicate_rate=0.1, seed=0):
+    """Return `({url: (contents, child_urls)}, duplicate_urls)`.
+
+    Host sizes and link popularity follow Zipf's law, so a few hosts hold
+    most pages and a few pages draw most links; every page also links to
+    one page at random so most of the graph is reachable. Page lengths are
+    log-normal around `mean_words`. A `duplicate_rate` fraction of pages
+    copy an earlier page with one word changed; their urls are returned in
+    `duplicate_urls`.
+    """
+    rng = random.Random(seed)
+    hosts = rng.choices(range(num_hosts),
+                        [1.0 / rank for rank in range(1, num_hosts + 1)],
+                        k=num_pages)
+    urls = ['http://host%d.example/page%d' % (host, i)
+            for i, host in enumerate(hosts)]
+    by_popularity = rng.sample(urls, num_pages)
+    cum_weights = list(accumulate(1.0 / rank
+                                  for rank in range(1, num_pages + 1)))
+    pages = {}
+    duplicate_urls = set()
+    for i, url in enumerate(urls):
+        child_urls = rng.choices(by_popularity, cum_weights=cum_weights,
+                                 k=links_per_page - 1)
+        child_urls.append(rng.choice(urls))
+        if i and rng.random() < duplicate_rate:
+            words = pages[urls[rng.randrange(i)]][0].split()
+            words[rng.randrange(len(words))] = 'changed'
+            contents = ' '.join(words)
+            duplicate_urls.add(url)
+        else:
+            num_words = int(rng.lognormvariate(math.log(mean_words), 0.5))
+            contents = random_text(rng, max(1, num_words))
+        pages[url] = (contents, child_urls)
+    return pages, duplicate_urls
+
+
+class StageTimes(object):
+    """Latency samples of each crawl stage."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)  # key: stage, value: seconds
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[stage].append(time.perf_counter() - start)
+
+    def timed(self, stage, function):
+        """Return `function` wrapped to record its calls under `stage`."""
+        def wrapper(*args, **kwargs):
+            with self.time(stage):
+                return function(*args, **kwargs)
+        return wrapper
+
+    def report(self, elapsed):
+        print('  %-14s %8s %8s %10s %10s' % ('stage', 'calls', 'share',
+                                              'mean us', 'p99 us'))
+        for stage, samples in sorted(self.samples.items()):
+            samples.sort()
+            print('  %-14s %8d %7.1f%% %10.1f %10.1f' % (
+                stage, len(samples), 100 * sum(samples) / elapsed,
+                1e6 * sum(samples) / len(samples),
+                1e6 * samples[min(len(samples) - 1,
+                                  int(len(samples) * 0.99))]))
+
+
+class SyntheticWeb(FakeWeb):
+    """`FakeWeb` with exponentially distributed latency, timed by stage.
+
+    The wait for the page is recorded as 'fetch' and building the `Page`,
+    which computes its signature, as 'signature'.
+    """
+
+    def __init__(self, pages, stage_times, mean_latency=0.0005, seed=0):
+        rng = random.Random(seed)
+        super(SyntheticWeb, self).__init__(
+            pages, lambda url: rng.expovariate(1.0 / mean_latency)
+            if mean_latency else 0.0)
+        self.stage_times = stage_times
+
+    def fetch(self, url):
+        host = self._start(url)
+        try:
+            with self.stage_times.time('fetch'):
+                time.sleep(self.latency(url))
+        finally:
+            self.in_flight[host] -= 1
+        with self.stage_times.time('signature'):
+            return self._page(url)
+
+
+def frontier_nbytes(data_store):
+    """Approximate bytes held by `data_store`'s url table and frontier."""
+    urls = data_store.urls
+    frontier = data_store.links_to_crawl
+    heaps = list(frontier.host_heaps.values()) + [frontier.ready]
+    nbytes = sum(sys.getsizeof(buffer) for buffer in [
+        urls.arena, urls.starts, urls.lengths, urls.host_ids, urls.index,
+        urls.free_ids, frontier.priorities, frontier.positions,
+        frontier.ready.priorities, frontier.ready.positions] +
+        [heap.heap for heap in heaps])
+    for table in (urls.host_lookup, frontier.host_heaps,
+                  frontier.next_fetch):
+        nbytes += sys.getsizeof(table) + sum(
+            sys.getsizeof(key) + sys.getsizeof(value)
+            for key, value in table.items())
+    return (nbytes + sys.getsizeof(frontier.waiting) +
+            sys.getsizeof(frontier.scheduled))
+
+
+def bench_crawl(num_pages=5000, num_hosts=100, mean_latency=0.0005,
+                mean_words=300, duplicate_rate=0.1):
+    """Pages/sec, frontier memory, dedup results and stage latencies of
+    the serial `Crawler` over a synthetic power-law web.
+
+    Run once with exact seen-url tracking and once with a Bloom filter.
+    Stage shares don't add up to 100%: the rest is the crawl loop itself.
+    """
+    web_pages, duplicate_urls = power_law_web(
+        num_pages, num_hosts, mean_words=mean_words,
+        duplicate_rate=duplicate_rate)
+    configurations = [
+        ('exact seen urls', lambda: None),
+        ('bloom seen urls', lambda: BloomFilter(num_pages * 2, 0.001)),
+    ]
+    for name, seen in configurations:
+        stage_times = StageTimes()
+        web = SyntheticWeb(web_pages, stage_times, mean_latency)
+        data_store = PagesDataStore(None, crawl_delay=0, seen=seen())
+        for url in list(web_pages)[:10]:
+            data_store.add_link_to_crawl(url)
+        for method, stage in [
+                ('extract_max_priority_page', 'frontier pop'),
+                ('add_link_to_crawl', 'frontier push'),
+                ('crawled_similar', 'dedup check'),
+                ('insert_crawled_link', 'dedup insert')]:
+            setattr(data_store, method,
+                    stage_times.timed(stage, getattr(data_store, method)))
+        index_queue = NullQueue()
+        index_queue.generate = stage_times.timed('index', index_queue.generate)
+        crawler = Crawler(web, data_store, index_queue, index_queue)
+        start = time.perf_counter()
+        crawler.crawl()
+        elapsed = time.perf_counter() - start
+        crawled = len(data_store.signatures)
+        skipped = web.fetches - crawled
+        print('%s: %d of %d pages fetched, %.0f pages/s' % (
+            name, web.fetches, num_pages, web.fetches / elapsed))
+        print('  frontier and url table: %.2f MB, seen filter %.2f MB' % (
+            frontier_nbytes(data_store) / 1e6,
+            getattr(data_store.seen, 'nbytes', 0) / 1e6))
+        print('  near duplicates skipped: %d (%d generated)' % (
+            skipped, len(duplicate_urls)))
+        stage_times.report(elapsed)
+
+
+def bench_concurrency(num_pages=2000, num_hosts=100, latency=0.005,
+                      in_flight_limits=(1, 8, 64, 256), max_per_host=4):
+    """Pages/sec of `AsyncCrawler` against a fake web by in-flight limit."""
+    web_pages = random_web(num_pages, num_hosts)
+    print('%10s %12s' % ('in-flight', 'pages/s'))
+    for limit in in_flight_limits:
+        web = AsyncFakeWeb(web_pages, latency=latency)
+        data_store = PagesDataStore(None, crawl_delay=0)
+        for url in list(web_pages)[:10]:
+            data_store.add_link_to_crawl(url)
+        crawler = AsyncCrawler(web, data_store, NullQueue(), NullQueue(),
+                               max_in_flight=limit, max_per_host=max_per_host)
+        start = time.perf_counter()
+        asyncio.run(crawler.crawl())
+        print('%10d %12.0f' % (limit, web.fetches /
+                               (time.perf_counter() - start)))
+
+
+def bench_near_duplicates(num_fingerprints=200000, num_lookups=200,
+                          num_words=1000, distance=3):
+    """Cost of signing a page and of finding a near duplicate."""
+    rng = random.Random(0)
+    texts = [random_text(rng, num_words) for _ in range(20)]
+    start = time.perf_counter()
+    for text in texts:
+        simhash(text)
+    print('simhash of %d words: %.2f ms' % (
+        num_words, (time.perf_counter() - start) * 1e3 / len(texts)))
+    fingerprints = [rng.getrandbits(64) for _ in range(num_fingerprints)]
+    queries = [fingerprint ^ 1 << rng.randrange(64)
+               for fingerprint in rng.sample(fingerprints, num_lookups)]
+    print('%-22s %12s' % ('lookup', 'us/lookup'))
+    start = time.perf_counter()
+    for query in queries[:10]:
+        any(hamming_distance(query, fingerprint) <= distance
+            for fingerprint in fingerprints)
+    print('%-22s %12.1f' % ('linear scan', (time.perf_counter() - start) *
+                            1e6 / 10))
+    for blocks in (distance + 1, 6):
+        index = SimHashIndex(distance, blocks)
+        for fingerprint in fingerprints:
+            index.add(fingerprint)
+        start = time.perf_counter()
+        for query in queries:
+            index.find(query)
+        print('%-22s %12.1f' % ('index, %d blocks' % blocks,
+                                (time.perf_counter() - start) * 1e6 /
+                                num_lookups))
+
+
+class UrlSet(set):
+
+    def add(self, url):
+        is_new = url not in self
+        super(UrlSet, self).add(url)
+        return is_new
+
+
+def bench_seen_filters(num_urls=100000, num_probes=100000):
+    """Memory, false positive rate and add cost of seen-url structures.
+
+    Memory is what tracemalloc sees allocated while adding the urls, so it
+    counts the url strings kept by the exact structures. Adds are timed in
+    a second, untraced pass.
+    """
+    def urls(start, stop):
+        for i in range(start, stop):
+            yield 'http://host%d.example/path/to/page%d.html' % (i % 5000, i)
+
+    def fill(factory):
+        seen = factory()
+        for url in urls(0, num_urls):
+            seen.add(url)
+        return seen
+
+    structures = [
+        ('set of str', UrlSet),
+        ('UrlTable', UrlTable),
+        ('bloom 1%', lambda: BloomFilter(num_urls, 0.01)),
+        ('bloom 0.1%', lambda: BloomFilter(num_urls, 0.001)),
+        ('scalable bloom 1%', lambda: ScalableBloomFilter(num_urls // 16)),
+        ('cuckoo 1%', lambda: CuckooFilter(num_urls, 0.01)),
+        ('cuckoo 0.01%', lambda: CuckooFilter(num_urls, 0.0001)),
+    ]
+    print('%-18s %10s %10s %10s' % ('structure', 'bytes/url', 'fpr',
+                                    'us/add'))
+    for name, factory in structures:
+        tracemalloc.start()
+        seen = fill(factory)
+        nbytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        if isinstance(seen, UrlTable):
+            contains = lambda url: seen.id_of(url) is not None
+        else:
+            contains = seen.__contains__
+        false_positives = sum(map(contains,
+                                  urls(num_urls, num_urls + num_probes)))
+        start = time.perf_counter()
+        fill(factory)
+        elapsed = time.perf_counter() - start
+        print('%-18s %10.1f %9.3f%% %10.2f' % (
+            name, nbytes / num_urls, 100.0 * false_positives / num_probes,
+            elapsed * 1e6 / num_urls))
+
+
+def bench_index_queues(num_pages=500, queue_latency=0.002,
+                       batch_sizes=(None, 10, 100)):
+    """Pages/sec of the serial `Crawler` with slow index queues.
+
+    Batch size None sends each page straight to the queues.
+    """
+    web_pages = random_web(num_pages, num_hosts=50)
+    print('%10s %12s %12s' % ('batch', 'pages/s', 'round trips'))
+    for batch_size in batch_sizes:
+        data_store = PagesDataStore(None, crawl_delay=0)
+        data_store.add_link_to_crawl(next(iter(web_pages)))
+        queues = [InMemoryQueue(queue_latency) for _ in range(2)]
+        producers = queues
+        if batch_size is not None:
+            producers = [BatchingQueue(queue, max_batch=batch_size)
+                         for queue in queues]
+        start = time.perf_counter()
+        Crawler(FakeWeb(web_pages), data_store, *producers).crawl()
+        if batch_size is not None:
+            for producer in producers:
+                producer.close()
+        print('%10s %12.0f %12d' % (
+            batch_size or '-', num_pages / (time.perf_counter() - start),
+            sum(queue.round_trips for queue in queues)))
+
+
+if __name__ == '__main__':
+    bench_crawl()
+    bench_concurrency()
+    bench_near_duplicates()
+    bench_seen_filters()
+    bench_index_queues()
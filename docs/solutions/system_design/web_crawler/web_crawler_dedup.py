@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Url normalisation and a local, bounded-memory url dedup.
+
+`dedup_urls` does what the `RemoveDuplicateUrls` MapReduce job does, in one
+process: it streams urls of any volume, counting them in memory until
+`max_in_memory` distinct urls are held, then spills the counts to
+hash-partitioned files on disk and dedups each partition on its own.
+
+    python -m web_crawler.web_crawler_dedup urls.txt > distinct_urls.txt
+"""
+import os
+import sys
+import tempfile
+from collections import Counter
+from hashlib import blake2b
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url):
+    """Return a canonical spelling of `url`, '' for a blank line.
+
+    Lowercases the scheme and host, drops the default port and the
+    fragment, uses '/' for an empty path and sorts the query parameters.
+    """
+    url = url.strip()
+    if not url:
+        return ''
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc
+    if ':' in netloc or '@' in netloc:
+        netloc = _normalize_netloc(parts, scheme)
+    else:
+        netloc = netloc.lower()  # the common case, parsed faster
+    query = '&'.join(sorted(param for param in parts.query.split('&')
+                            if param))
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+def _normalize_netloc(parts, scheme):
+    netloc = parts.hostname or ''
+    if ':' in netloc:
+        netloc = '[%s]' % netloc  # IPv6
+    try:
+        port = parts.port
+    except ValueError:
+        port = None  # not a number, leave it out
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc += ':%d' % port
+    if parts.username is not None:
+        userinfo = parts.netloc.rpartition('@')[0]
+        netloc = '%s@%s' % (userinfo, netloc)
+    return netloc
+
+
+def _partition(url, num_partitions, depth):
+    # A hash salted by depth re-splits a partition that was still too big.
+    # Not crc32: it is linear, so a new seed only relabels the partitions
+    digest = blake2b(url.encode('utf-8'), digest_size=8,
+                     salt=str(depth).encode('ascii')).digest()
+    return int.from_bytes(digest, 'little') % num_partitions
+
+
+def _spill(counts, files, depth):
+    num_partitions = len(files)
+    for url, count in counts.items():
+        files[_partition(url, num_partitions, depth)].write(
+            '%s\t%d\n' % (url, count))
+    counts.clear()
+
+
+def _read_spill(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            url, _, count = line.rstrip('\n').rpartition('\t')
+            yield url, int(count)
+
+
+def _dedup(counted_urls, max_in_memory, num_partitions, tmp_dir, depth):
+    counts = Counter()
+    files = None
+    for url, count in counted_urls:
+        counts[url] += count
+        if len(counts) > max_in_memory:
+            if files is None:
+                files = [open(os.path.join(tmp_dir, '%d-%d' % (depth, i)),
+                              'w', encoding='utf-8')
+                         for i in range(num_partitions)]
+            _spill(counts, files, depth)
+    if files is None:
+        # Everything fit in memory
+        for url in sorted(counts):
+            yield url, counts[url]
+        return
+    _spill(counts, files, depth)
+    paths = [f.name for f in files]
+    for f in files:
+        f.close()
+    for path in paths:
+        for url_count in _dedup(_read_spill(path), max_in_memory,
+                                num_partitions, tmp_dir, depth + 1):
+            yield url_count
+        os.remove(path)
+
+
+def dedup_urls(lines, max_in_memory=1000000, num_partitions=64,
+               tmp_dir=None):
+    """Yield `(url, count)` for each distinct normalised url in `lines`.
+
+    About `max_in_memory` distinct urls are counted in memory at once.
+    Urls come out sorted within each partition.
+    """
+    counted_urls = ((url, 1) for url in map(normalize_url, lines) if url)
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as spill_dir:
+        for url_count in _dedup(counted_urls, max_in_memory, num_partitions,
+                                spill_dir, 0):
+            yield url_count
+
+
+if __name__ == '__main__':
+    with open(sys.argv[1], encoding='utf-8') as lines:
+        for url, _ in dedup_urls(lines):
+            sys.stdout.write(url + '\n')
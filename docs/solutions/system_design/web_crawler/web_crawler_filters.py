@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""Compact probabilistic sets for urls the crawler has already seen.
+
+A filter answers "was this url added?" with no false negatives and a tunable
+false positive rate, in a few bytes per url instead of the url itself:
+
+* `BloomFilter` holds a fixed number of urls in about 1.2 bytes each at a 1%
+  false positive rate.
+* `ScalableBloomFilter` chains Bloom filters of growing size, so the
+  capacity need not be known up front.
+* `CuckooFilter` stores a short fingerprint per url and, unlike a Bloom
+  filter, supports `remove`.
+
+Bloom and cuckoo filters keep their state in one flat buffer, so `save`
+writes it to a file and `open` maps the file back in without a load step.
+"""
+import math
+import mmap
+import random
+import struct
+from array import array
+from hashlib import blake2b
+
+
+def _hashes(key):
+    """Return two independent 64-bit hashes of `key`, stable across runs."""
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    digest = blake2b(key, digest_size=16).digest()
+    return (int.from_bytes(digest[:8], 'little'),
+            int.from_bytes(digest[8:], 'little'))
+
+
+class BufferFilter(object):
+    """Base for filters whose state is a header plus one flat buffer.
+
+    Subclasses define `MAGIC`, `HEADER`, `_header_fields()` and
+    `_init_fields(fields)`, and keep their contents in `self.buffer`.
+    """
+
+    mmap = None
+
+    def _init_buffer(self, buffer):
+        self.buffer = buffer
+
+    @property
+    def nbytes(self):
+        return len(self.buffer)
+
+    def save(self, path):
+        """Write the filter to `path`, to be mapped back in with `open`."""
+        with open(path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, *self._header_fields()))
+            f.write(self.buffer)
+
+    @classmethod
+    def open(cls, path, readonly=False):
+        """Map the filter saved at `path`.
+
+        Adds write straight into the mapping; `close` also stores the count.
+        """
+        with open(path, 'rb' if readonly else 'r+b') as f:
+            access = mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE
+            mapping = mmap.mmap(f.fileno(), 0, access=access)
+        fields = cls.HEADER.unpack_from(mapping, 0)
+        if fields[0] != cls.MAGIC:
+            mapping.close()
+            raise ValueError('Not a %s file: %s' % (cls.__name__, path))
+        seen = cls.__new__(cls)
+        seen.mmap = mapping
+        seen._init_fields(fields[1:])
+        seen._init_buffer(memoryview(mapping)[cls.HEADER.size:])
+        return seen
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.mmap is None:
+            return
+        if not self.buffer.readonly:
+            self.HEADER.pack_into(self.mmap, 0, self.MAGIC,
+                                  *self._header_fields())
+        self.buffer.release()
+        self.mmap.close()
+        self.mmap = None
+
+
+class BloomFilter(BufferFilter):
+    """Bloom filter sized for `capacity` urls at `error_rate` false positives.
+
+    Each url sets `num_hashes` bits, derived from one BLAKE2b digest by
+    double hashing. Past `capacity` urls the false positive rate climbs.
+    """
+
+    MAGIC = b'BLOOM001'
+    # magic, capacity, error_rate, num_bits, num_hashes, count
+    HEADER = struct.Struct('<8sQdQQQ')
+
+    def __init__(self, capacity, error_rate=0.01):
+        num_bits = math.ceil(-capacity * math.log(error_rate) /
+                             math.log(2) ** 2)
+        num_bits = max(64, (num_bits + 7) // 8 * 8)
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self._init_fields((capacity, error_rate, num_bits, num_hashes, 0))
+        self._init_buffer(bytearray(num_bits // 8))
+
+    def _header_fields(self):
+        return (self.capacity, self.error_rate, self.num_bits,
+                self.num_hashes, self.count)
+
+    def _init_fields(self, fields):
+        (self.capacity, self.error_rate, self.num_bits, self.num_hashes,
+         self.count) = fields
+
+    def __len__(self):
+        """Number of urls added, less any false positives on add."""
+        return self.count
+
+    def _positions(self, key):
+        h1, h2 = _hashes(key)
+        h2 |= 1
+        num_bits = self.num_bits
+        return [(h1 + i * h2) % num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, key):
+        bits = self.buffer
+        for position in self._positions(key):
+            if not bits[position >> 3] & 1 << (position & 7):
+                return False
+        return True
+
+    def add(self, key):
+        """Add `key`, returning False if it was (probably) already added."""
+        bits = self.buffer
+        is_new = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                is_new = True
+        if is_new:
+            self.count += 1
+        return is_new
+
+    @property
+    def is_full(self):
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter(object):
+    """Bloom filter that grows by chaining filters as urls are added.
+
+    Each new filter is `growth` times larger than the last, with its error
+    rate multiplied by `tightening`, so the false positive rate over all of
+    them stays under `error_rate` however many urls are added (Almeida et
+    al., "Scalable Bloom Filters").
+    """
+
+    def __init__(self, initial_capacity=100000, error_rate=0.01, growth=2,
+                 tightening=0.5):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+
+    def __len__(self):
+        return sum(len(bloom) for bloom in self.filters)
+
+    def __contains__(self, key):
+        return any(key in bloom for bloom in reversed(self.filters))
+
+    @property
+    def nbytes(self):
+        return sum(bloom.nbytes for bloom in self.filters)
+
+    def add(self, key):
+        """Add `key`, returning False if it was (probably) already added."""
+        if key in self:
+            return False
+        if not self.filters or self.filters[-1].is_full:
+            level = len(self.filters)
+            self.filters.append(BloomFilter(
+                self.initial_capacity * self.growth ** level,
+                self.error_rate * (1 - self.tightening) *
+                self.tightening ** level))
+        return self.filters[-1].add(key)
+
+
+class CuckooFilter(BufferFilter):
+    """Cuckoo filter: a fingerprint per url in one of two candidate buckets.
+
+    Fingerprints are 8, 16 or 32 bits, the smallest giving `error_rate`
+    with `bucket_size` slots per bucket (Fan et al., "Cuckoo Filter:
+    Practically Better Than Bloom"). A url's second bucket is computed from
+    its first and its fingerprint alone, which lets inserts relocate
+    fingerprints and makes `remove` possible.
+
+    `add` skips urls that already test positive, so each url is stored at
+    most once; removing a url that was only a false positive on add could
+    remove another url's fingerprint.
+    """
+
+    MAGIC = b'CUCKOO01'
+    # magic, num_buckets, bucket_size, fingerprint_bits, count
+    HEADER = struct.Struct('<8sQQQQ')
+    MAX_LOAD = 0.95
+    MAX_KICKS = 500
+    TYPECODES = {8: 'B', 16: 'H', 32: 'I'}
+
+    def __init__(self, capacity, error_rate=0.01, bucket_size=4):
+        needed_bits = math.log2(2 * bucket_size / error_rate)
+        fingerprint_bits = min(bits for bits in (8, 16, 32)
+                               if bits >= needed_bits)
+        num_buckets = 1
+        while num_buckets * bucket_size * self.MAX_LOAD < capacity:
+            num_buckets <<= 1
+        self._init_fields((num_buckets, bucket_size, fingerprint_bits, 0))
+        self._init_buffer(bytearray(num_buckets * bucket_size *
+                                    fingerprint_bits // 8))
+
+    def _header_fields(self):
+        return (self.num_buckets, self.bucket_size, self.fingerprint_bits,
+                self.count)
+
+    def _init_fields(self, fields):
+        (self.num_buckets, self.bucket_size, self.fingerprint_bits,
+         self.count) = fields
+        self.mask = self.num_buckets - 1
+        self.rng = random.Random(0)
+
+    def _init_buffer(self, buffer):
+        super(CuckooFilter, self)._init_buffer(buffer)
+        typecode = self.TYPECODES[self.fingerprint_bits]
+        if array(typecode).itemsize * 8 != self.fingerprint_bits:
+            raise ValueError('No %d-bit array type on this platform' %
+                             self.fingerprint_bits)
+        self.slots = memoryview(buffer).cast('B').cast(typecode)
+
+    def close(self):
+        if self.mmap is not None:
+            self.slots.release()
+        super(CuckooFilter, self).close()
+
+    def __len__(self):
+        return self.count
+
+    def _fingerprint_and_index(self, key):
+        h1, h2 = _hashes(key)
+        # Zero marks an empty slot, so fingerprints run from 1
+        fingerprint = h2 % ((1 << self.fingerprint_bits) - 1) + 1
+        return fingerprint, h1 & self.mask
+
+    def _alt_index(self, index, fingerprint):
+        # An odd multiplier spreads small fingerprints over all buckets
+        return (index ^ fingerprint * 0x5bd1e995) & self.mask
+
+    def _find(self, index, fingerprint):
+        start = index * self.bucket_size
+        for slot in range(start, start + self.bucket_size):
+            if self.slots[slot] == fingerprint:
+                return slot
+        return -1
+
+    def __contains__(self, key):
+        fingerprint, index = self._fingerprint_and_index(key)
+        return (self._find(index, fingerprint) >= 0 or
+                self._find(self._alt_index(index, fingerprint),
+                           fingerprint) >= 0)
+
+    def add(self, key):
+        """Add `key`, returning False if it was (probably) already added.
+
+        Raises IndexError if there is no room even after relocating other
+        fingerprints; the filter is left unchanged.
+        """
+        if key in self:
+            return False
+        fingerprint, index = self._fingerprint_and_index(key)
+        for bucket in (index, self._alt_index(index, fingerprint)):
+            slot = self._find(bucket, 0)
+            if slot >= 0:
+                self.slots[slot] = fingerprint
+                self.count += 1
+                return True
+        # Evict a random fingerprint to its other bucket, and so on, keeping
+        # the swaps so they can be undone if no empty slot turns up
+        swaps = []
+        bucket = self.rng.choice((index, self._alt_index(index, fingerprint)))
+        for _ in range(self.MAX_KICKS):
+            slot = bucket * self.bucket_size + self.rng.randrange(
+                self.bucket_size)
+            swaps.append(slot)
+            fingerprint, self.slots[slot] = self.slots[slot], fingerprint
+            bucket = self._alt_index(bucket, fingerprint)
+            empty = self._find(bucket, 0)
+            if empty >= 0:
+                self.slots[empty] = fingerprint
+                self.count += 1
+                return True
+        for slot in reversed(swaps):
+            fingerprint, self.slots[slot] = self.slots[slot], fingerprint
+        raise IndexError('Filter is full')
+
+    def remove(self, key):
+        fingerprint, index = self._fingerprint_and_index(key)
+        for bucket in (index, self._alt_index(index, fingerprint)):
+            slot = self._find(bucket, fingerprint)
+            if slot >= 0:
+                self.slots[slot] = 0
+                self.count -= 1
+                return
+        raise KeyError('Key not found')
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""The crawl frontier behind `PagesDataStore`'s `links_to_crawl`.
+
+Three pieces, each sized for tens of millions of pending urls:
+
+* `UrlTable` interns every url as a small integer id, keeping the url text
+  in one shared byte arena rather than one `str` object per url. Ids of
+  discarded urls are reused.
+* `IndexedHeap` is a max-heap of url ids by priority, stored in flat arrays
+  with a position index so a url's priority can change in O(log n).
+* `Frontier` combines them Mercator-style: each host has its own priority
+  heap, and the best url is taken from the hosts whose crawl delay has
+  passed, so no host is fetched more often than it allows.
+"""
+import heapq
+from array import array
+from urllib.parse import urlsplit
+
+
+class UrlTable(object):
+    """Map urls to dense integer ids, storing the urls in one byte arena.
+
+    Lookups go through `index`, an open-addressing hash table of url ids in
+    an `array('q')`, probed linearly and checked against the arena. A url
+    costs its encoded bytes plus a few array slots, where a dict or set
+    would also keep a `str` object and an entry for it.
+
+    `discard` frees a url's id for the next `add` to reuse, so ids, and the
+    arrays indexed by them, stay as dense as the urls still held. Its text
+    is dropped when the arena is next compacted, once discarded text
+    outweighs the live urls.
+    """
+
+    MAX_LOAD = 0.75
+
+    def __init__(self):
+        self.arena = bytearray()
+        # url id i spans arena[starts[i]:starts[i] + lengths[i]]
+        self.starts = array('Q')
+        self.lengths = array('I')
+        self.host_ids = array('l')  # key: url id, value: host id
+        self.hosts = []  # key: host id, value: host
+        self.host_lookup = {}  # key: host, value: host id
+        self.index = array('q', [-1]) * 8  # url ids by hash, -1 when empty
+        self.mask = len(self.index) - 1
+        self.free_ids = array('l')  # discarded ids, reused by `add`
+        self.live_bytes = 0
+
+    def __len__(self):
+        return len(self.host_ids) - len(self.free_ids)
+
+    def _encoded(self, url_id):
+        start = self.starts[url_id]
+        return self.arena[start:start + self.lengths[url_id]]
+
+    def url(self, url_id):
+        return self._encoded(url_id).decode('utf-8')
+
+    def host_id(self, url_id):
+        return self.host_ids[url_id]
+
+    def _slot(self, encoded):
+        """Return the slot holding `encoded`, or the empty one it goes in."""
+        index, lengths, mask = self.index, self.lengths, self.mask
+        slot = hash(encoded) & mask
+        while True:
+            url_id = index[slot]
+            if url_id < 0 or (lengths[url_id] == len(encoded) and
+                              self._encoded(url_id) == encoded):
+                return slot
+            slot = (slot + 1) & mask
+
+    def _home(self, url_id):
+        return hash(bytes(self._encoded(url_id))) & self.mask
+
+    def id_of(self, url):
+        """Return the id of `url`, None if it was never added."""
+        url_id = self.index[self._slot(url.encode('utf-8'))]
+        return url_id if url_id >= 0 else None
+
+    def add(self, url):
+        """Return the id of `url`, adding it first if it is new."""
+        encoded = url.encode('utf-8')
+        slot = self._slot(encoded)
+        if self.index[slot] >= 0:
+            return self.index[slot]
+        host = urlsplit(url).netloc.lower()
+        host_id = self.host_lookup.get(host)
+        if host_id is None:
+            host_id = self.host_lookup[host] = len(self.hosts)
+            self.hosts.append(host)
+        if self.free_ids:
+            url_id = self.free_ids.pop()
+            self.starts[url_id] = len(self.arena)
+            self.lengths[url_id] = len(encoded)
+            self.host_ids[url_id] = host_id
+        else:
+            url_id = len(self.host_ids)
+            self.starts.append(len(self.arena))
+            self.lengths.append(len(encoded))
+            self.host_ids.append(host_id)
+        self.arena += encoded
+        self.live_bytes += len(encoded)
+        self.index[slot] = url_id
+        if len(self) > len(self.index) * self.MAX_LOAD:
+            self._resize(2 * len(self.index))
+        return url_id
+
+    def _resize(self, num_slots):
+        old_index = self.index
+        self.index = index = array('q', [-1]) * num_slots
+        self.mask = mask = num_slots - 1
+        for url_id in old_index:
+            if url_id >= 0:
+                slot = self._home(url_id)
+                while index[slot] >= 0:
+                    slot = (slot + 1) & mask
+                index[slot] = url_id
+
+    def _remove_slot(self, slot):
+        """Empty `slot`, moving later urls of its probe run back into it.
+
+        Linear probing can fill the hole this way instead of leaving a
+        tombstone that every later lookup would have to step over.
+        """
+        index, mask = self.index, self.mask
+        while True:
+            index[slot] = -1
+            next_slot = slot
+            while True:
+                next_slot = (next_slot + 1) & mask
+                url_id = index[next_slot]
+                if url_id < 0:
+                    return
+                # Movable unless its home slot lies after the hole
+                distance = (next_slot - self._home(url_id)) & mask
+                if distance >= (next_slot - slot) & mask:
+                    break
+            index[slot] = url_id
+            slot = next_slot
+
+    def discard(self, url_id):
+        """Forget the url with id `url_id`, freeing the id for reuse."""
+        encoded = bytes(self._encoded(url_id))
+        self._remove_slot(self._slot(encoded))
+        self.lengths[url_id] = 0
+        self.free_ids.append(url_id)
+        self.live_bytes -= len(encoded)
+        # Compacting costs a pass over every id, so wait until at least
+        # that many bytes are dead
+        dead_bytes = len(self.arena) - self.live_bytes
+        if dead_bytes > max(self.live_bytes, len(self.host_ids)):
+            self._compact()
+
+    def _compact(self):
+        """Copy the live urls into a new arena, dropping discarded text."""
+        arena = bytearray()
+        starts, lengths = self.starts, self.lengths
+        for url_id in range(len(starts)):
+            start = starts[url_id]
+            starts[url_id] = len(arena)
+            arena += self.arena[start:start + lengths[url_id]]
+        self.arena = arena
+
+
+class IndexedHeap(object):
+    """Max-heap of integer ids with O(log n) priority updates.
+
+    `heap` holds ids in heap order; `priorities` and `positions` are indexed
+    by id, so ids should be small and dense, like `UrlTable` ids. Heaps
+    holding disjoint ids can share `priorities` and `positions`.
+    """
+
+    def __init__(self, priorities=None, positions=None):
+        self.heap = array('l')
+        self.priorities = array('d') if priorities is None else priorities
+        # -1 when the id is not in the heap
+        self.positions = array('l') if positions is None else positions
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item_id):
+        return (item_id < len(self.positions) and
+                self.positions[item_id] >= 0)
+
+    def priority(self, item_id):
+        return self.priorities[item_id]
+
+    def push(self, item_id, priority):
+        """Add `item_id`, or change its priority if it is already queued."""
+        while len(self.positions) <= item_id:
+            self.positions.append(-1)
+            self.priorities.append(0.0)
+        if self.positions[item_id] >= 0:
+            self.update(item_id, priority)
+            return
+        self.priorities[item_id] = priority
+        self.heap.append(item_id)
+        self.positions[item_id] = len(self.heap) - 1
+        self._sift_up(len(self.heap) - 1)
+
+    def update(self, item_id, priority):
+        old_priority = self.priorities[item_id]
+        self.priorities[item_id] = priority
+        if priority > old_priority:
+            self._sift_up(self.positions[item_id])
+        else:
+            self._sift_down(self.positions[item_id])
+
+    def pop(self):
+        """Remove and return the id with the highest priority."""
+        top = self.heap[0]
+        self.remove(top)
+        return top
+
+    def peek(self):
+        return self.heap[0]
+
+    def remove(self, item_id):
+        index = self.positions[item_id]
+        last = self.heap.pop()
+        self.positions[item_id] = -1
+        if last != item_id:
+            self.heap[index] = last
+            self.positions[last] = index
+            self._sift_up(index)
+            self._sift_down(self.positions[last])
+
+    def _sift_up(self, index):
+        heap, priorities, positions = self.heap, self.priorities, self.positions
+        item_id = heap[index]
+        priority = priorities[item_id]
+        while index > 0:
+            parent = (index - 1) >> 1
+            parent_id = heap[parent]
+            if priorities[parent_id] >= priority:
+                break
+            heap[index] = parent_id
+            positions[parent_id] = index
+            index = parent
+        heap[index] = item_id
+        positions[item_id] = index
+
+    def _sift_down(self, index):
+        heap, priorities, positions = self.heap, self.priorities, self.positions
+        size = len(heap)
+        item_id = heap[index]
+        priority = priorities[item_id]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if (child + 1 < size and
+                    priorities[heap[child + 1]] > priorities[heap[child]]):
+                child += 1
+            child_id = heap[child]
+            if priorities[child_id] <= priority:
+                break
+            heap[index] = child_id
+            positions[child_id] = index
+            index = child
+        heap[index] = item_id
+        positions[item_id] = index
+
+
+class Frontier(object):
+    """Priority order across hosts, politeness within each host.
+
+    Each host's queued urls are in their own `IndexedHeap`; the heaps share
+    one `priorities` and one `positions` array, so any queued url can be
+    found, reprioritised or removed by id. Hosts whose crawl delay has
+    passed sit in `ready`, a heap keyed by their best url's priority;
+    hosts still cooling down wait in `waiting` until their next fetch time.
+    `pop(now)` takes the best url of the best ready host.
+    """
+
+    def __init__(self, urls, crawl_delay=1.0, crawl_delays=None):
+        self.urls = urls
+        self.crawl_delay = crawl_delay
+        self.crawl_delays = crawl_delays or {}  # key: host, value: seconds
+        self.priorities = array('d')
+        self.positions = array('l')
+        self.host_heaps = {}  # key: host id, value: IndexedHeap of url ids
+        self.ready = IndexedHeap()  # host ids by best url priority
+        self.waiting = []  # (next fetch time, host id) of cooling hosts
+        self.scheduled = set()  # host ids in `waiting`
+        self.next_fetch = {}  # key: host id, value: earliest next fetch time
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, url_id):
+        return (url_id < len(self.positions) and
+                self.positions[url_id] >= 0)
+
+    def priority(self, url_id):
+        return self.priorities[url_id]
+
+    def _host_heap(self, host_id):
+        heap = self.host_heaps.get(host_id)
+        if heap is None:
+            heap = self.host_heaps[host_id] = IndexedHeap(self.priorities,
+                                                          self.positions)
+        return heap
+
+    def _host_changed(self, host_id):
+        """Re-rank `host_id` in `ready` after its heap changed."""
+        heap = self.host_heaps[host_id]
+        if not heap:
+            if host_id in self.ready:
+                self.ready.remove(host_id)
+            del self.host_heaps[host_id]
+        elif host_id in self.ready:
+            self.ready.update(host_id, self.priorities[heap.peek()])
+        elif host_id not in self.scheduled:
+            # Never fetched hosts are due at once; `pop` moves them to ready
+            self.scheduled.add(host_id)
+            heapq.heappush(self.waiting, (
+                self.next_fetch.get(host_id, float('-inf')), host_id))
+
+    def push(self, url_id, priority):
+        """Queue `url_id`, or change its priority if it is already queued."""
+        if url_id not in self:
+            self.size += 1
+        host_id = self.urls.host_id(url_id)
+        self._host_heap(host_id).push(url_id, priority)
+        self._host_changed(host_id)
+
+    def update(self, url_id, priority):
+        host_id = self.urls.host_id(url_id)
+        self.host_heaps[host_id].update(url_id, priority)
+        self._host_changed(host_id)
+
+    def remove(self, url_id):
+        host_id = self.urls.host_id(url_id)
+        self.host_heaps[host_id].remove(url_id)
+        self.size -= 1
+        self._host_changed(host_id)
+
+    def _wake(self, now):
+        while self.waiting and self.waiting[0][0] <= now:
+            _, host_id = heapq.heappop(self.waiting)
+            self.scheduled.discard(host_id)
+            heap = self.host_heaps.get(host_id)
+            if heap:
+                self.ready.push(host_id, self.priorities[heap.peek()])
+
+    def pop(self, now):
+        """Return the next url id to fetch at `now`, None if none is ready."""
+        self._wake(now)
+        if not self.ready:
+            return None
+        host_id = self.ready.pop()
+        url_id = self.host_heaps[host_id].pop()
+        self.size -= 1
+        host = self.urls.hosts[host_id]
+        self.next_fetch[host_id] = now + self.crawl_delays.get(
+            host, self.crawl_delay)
+        self._host_changed(host_id)
+        return url_id
+
+    def next_ready_time(self):
+        """Return when `pop` can next return a url, None if it never will."""
+        if self.ready:
+            return float('-inf')
+        # Drop hosts whose urls were all removed while they waited
+        while self.waiting and self.waiting[0][1] not in self.host_heaps:
+            self.scheduled.discard(heapq.heappop(self.waiting)[1])
+        if self.waiting:
+            return self.waiting[0][0]
+        return None
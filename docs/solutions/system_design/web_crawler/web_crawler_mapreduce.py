@@ -1,23 +1,56 @@
 # -*- coding: utf-8 -*-
 
 from mrjob.job import MRJob
+from mrjob.step import MRStep
+
+try:
+    from .web_crawler_dedup import normalize_url
+except ImportError:  # run as a script, as mrjob's local and Hadoop runners do
+    from web_crawler_dedup import normalize_url
 
 
 class RemoveDuplicateUrls(MRJob):
+    """Output each distinct url once, with how many times it appeared.
+
+    Urls are normalised in the mapper so different spellings of one url
+    count as duplicates. Each mapper sums counts in memory and the combiner
+    merges what is left, so roughly one record per distinct url per mapper
+    crosses the shuffle rather than one per input line.
+    """
+
+    FILES = ['web_crawler_dedup.py']
+    MAX_MAPPER_URLS = 100000
+
+    def mapper_init(self):
+        self.counts = {}
 
     def mapper(self, _, line):
-        yield line, 1
+        url = normalize_url(line)
+        if url:
+            self.counts[url] = self.counts.get(url, 0) + 1
+            if len(self.counts) >= self.MAX_MAPPER_URLS:
+                for url_count in self.mapper_final():
+                    yield url_count
+
+    def mapper_final(self):
+        for url, count in self.counts.items():
+            yield url, count
+        self.counts = {}
+
+    def combiner(self, key, values):
+        yield key, sum(values)
 
     def reducer(self, key, values):
-        total = sum(values)
-        if total == 1:
-            yield key, total
+        yield key, sum(values)
 
     def steps(self):
         """Run the map and reduce steps."""
         return [
-            self.mr(mapper=self.mapper,
-                    reducer=self.reducer)
+            MRStep(mapper_init=self.mapper_init,
+                   mapper=self.mapper,
+                   mapper_final=self.mapper_final,
+                   combiner=self.combiner,
+                   reducer=self.reducer)
         ]
 
 
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""Batched producers for the reverse index and document index queues.
+
+`Crawler.crawl_page` hands each page to `reverse_index_queue.generate` and
+`doc_index_queue.generate`. Wrapping each queue in a `BatchingQueue` makes
+those calls cheap: pages are buffered and a background thread sends them
+in batches, so the crawl loop only waits when the buffer is full.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+def page_size(page):
+    """Rough bytes a page takes up in a queue message."""
+    return len(page.url) + len(page.contents or '')
+
+
+class InMemoryQueue(object):
+    """Stand-in for an index queue that keeps what it receives in `pages`.
+
+    Each call costs `latency` seconds, like a round trip to a real queue,
+    whether it carries one page or a batch.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.pages = []
+        self.round_trips = 0
+        self.lock = threading.Lock()
+
+    def generate(self, page):
+        self.generate_many([page])
+
+    def generate_many(self, pages):
+        time.sleep(self.latency)
+        with self.lock:
+            self.pages.extend(pages)
+            self.round_trips += 1
+
+
+class BatchingQueue(object):
+    """Buffer pages for `queue` and send them in batches from a thread.
+
+    A batch is sent once it has `max_batch` pages or `max_batch_bytes`
+    bytes, or when its oldest page has waited `max_delay` seconds. Batches go
+    through `queue.generate_many` if the queue has it, else one `generate`
+    per page. At most `max_pending` pages are buffered: `generate` then
+    waits for the sender to catch up, which slows the crawl to the indexer's
+    pace, and raises IndexError if `timeout` passes first. Coroutines
+    should call `agenerate`, which waits without blocking the event loop.
+
+    A batch that `queue` fails to take goes back to the front of the buffer
+    and is retried up to `max_retries` times, `retry_delay` seconds apart
+    and doubling. If it still fails, the error is raised by the next
+    `generate` or `flush`, after which sending resumes; the pages left are
+    listed by `undelivered`.
+
+    Call `close`, or use the queue in a `with` block, to send what is left.
+    """
+
+    def __init__(self, queue, max_batch=100, max_batch_bytes=1 << 20,
+                 max_delay=0.5, max_pending=1000, size_of=page_size,
+                 max_retries=3, retry_delay=0.1):
+        self.queue = queue
+        self.max_batch = max_batch
+        self.max_batch_bytes = max_batch_bytes
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.size_of = size_of
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        # (page, size, time added) not yet taken by the sender
+        self.pending = deque()
+        self.pending_bytes = 0
+        self.sending = 0  # pages in the batch being sent
+        self.flushing = 0  # callers waiting in flush
+        self.closed = False
+        self.error = None  # first error not yet raised to a caller
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.sender = threading.Thread(target=self._send_batches, daemon=True)
+        self.sender.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            self.changed.notify_all()  # the sender waits for this
+            raise error
+
+    def generate(self, page, timeout=None):
+        size = self.size_of(page)
+        with self.changed:
+            self._raise_error()
+            if self.closed:
+                raise ValueError('Queue is closed')
+            if not self.changed.wait_for(
+                    lambda: (len(self.pending) < self.max_pending or
+                             self.error is not None), timeout):
+                raise IndexError('Queue is full')
+            self._raise_error()
+            self.pending.append((page, size, time.monotonic()))
+            self.pending_bytes += size
+            # The sender waits for a first page, then for a full batch
+            if len(self.pending) == 1 or self._batch_ready():
+                self.changed.notify_all()
+
+    async def agenerate(self, page):
+        """`generate` for coroutines: waits for room off the event loop."""
+        try:
+            self.generate(page, timeout=0)
+        except IndexError:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.generate, page)
+
+    def flush(self):
+        """Send everything buffered and wait until `queue` has it.
+
+        Raises the error from `queue` if a batch runs out of retries.
+        """
+        with self.changed:
+            self.flushing += 1
+            self.changed.notify_all()
+            try:
+                self.changed.wait_for(
+                    lambda: (not self.pending and not self.sending or
+                             self.error is not None))
+            finally:
+                self.flushing -= 1
+            self._raise_error()
+
+    def close(self):
+        """Flush, then stop the sender, even if the flush raises."""
+        try:
+            self.flush()
+        finally:
+            with self.changed:
+                self.closed = True
+                self.changed.notify_all()
+            self.sender.join()
+
+    def undelivered(self):
+        """Return the buffered pages `queue` has not taken yet."""
+        with self.lock:
+            return [page for page, _, _ in self.pending]
+
+    def _batch_ready(self):
+        if not self.pending:
+            return False
+        return (len(self.pending) >= self.max_batch or
+                self.pending_bytes >= self.max_batch_bytes or
+                self.flushing or self.closed or
+                self._wait_time() <= 0)
+
+    def _wait_time(self):
+        """Seconds until the oldest pending page is due to be sent."""
+        return self.pending[0][2] + self.max_delay - time.monotonic()
+
+    def _take_batch(self):
+        batch = []
+        batch_bytes = 0
+        while (self.pending and len(batch) < self.max_batch and
+               batch_bytes < self.max_batch_bytes):
+            entry = self.pending.popleft()
+            batch.append(entry)
+            batch_bytes += entry[1]
+        self.pending_bytes -= batch_bytes
+        self.sending = len(batch)
+        self.changed.notify_all()  # wake producers waiting for room
+        return batch
+
+    def _send(self, batch):
+        """Send `batch`; return how many pages `queue` took and any error."""
+        pages = [page for page, _, _ in batch]
+        sent = 0
+        try:
+            generate_many = getattr(self.queue, 'generate_many', None)
+            if generate_many is not None:
+                generate_many(pages)
+                sent = len(pages)
+            else:
+                for page in pages:
+                    self.queue.generate(page)
+                    sent += 1
+        except Exception as error:
+            return sent, error
+        return sent, None
+
+    def _send_batches(self):
+        failures = 0
+        while True:
+            with self.changed:
+                while not self._batch_ready():
+                    if self.closed:
+                        return
+                    self.changed.wait(self._wait_time() if self.pending
+                                      else None)
+                batch = self._take_batch()
+            sent, error = self._send(batch)
+            with self.changed:
+                self.sending = 0
+                self.changed.notify_all()
+                if error is None:
+                    failures = 0
+                    continue
+                # Put what was not sent back in front, in order, to retry
+                unsent = batch[sent:]
+                self.pending.extendleft(reversed(unsent))
+                self.pending_bytes += sum(size for _, size, _ in unsent)
+                failures += 1
+                if failures > self.max_retries:
+                    if self.error is None:
+                        self.error = error
+                    self.changed.notify_all()
+                    # Resume once a caller has seen the error
+                    self.changed.wait_for(
+                        lambda: self.error is None or self.closed)
+                    failures = 0
+                else:
+                    self.changed.wait_for(
+                        lambda: self.closed,
+                        self.retry_delay * 2 ** (failures - 1))
+                if self.closed:
+                    return
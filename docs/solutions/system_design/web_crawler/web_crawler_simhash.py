@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Near-duplicate page detection with SimHash.
+
+`simhash` reduces a page to a 64-bit fingerprint in which similar pages
+differ in few bits. `SimHashIndex` answers "is any indexed fingerprint
+within `distance` bits of this one" with a handful of dict lookups instead
+of a scan over every crawled page.
+"""
+import re
+from hashlib import blake2b
+from itertools import combinations
+
+WORD_RE = re.compile(r'\w+')
+# BIT_TABLES[i] maps a byte to its bit i, for bytes.translate
+BIT_TABLES = [bytes(value >> bit & 1 for value in range(256))
+              for bit in range(8)]
+
+
+def simhash(text, shingle_size=3):
+    """Return the 64-bit SimHash of the word shingles of `text`.
+
+    `text` is scanned once for words and each run of `shingle_size` words is
+    hashed. A fingerprint bit is set when it is set in more than half of the
+    shingle hashes.
+    """
+    words = WORD_RE.findall(text.lower())
+    shingles = zip(*[words[i:] for i in range(shingle_size)])
+    if 0 < len(words) < shingle_size:
+        shingles = [words]
+    digests = b''.join(
+        blake2b(' '.join(shingle).encode('utf-8'), digest_size=8).digest()
+        for shingle in shingles)
+    count = len(digests) // 8
+    fingerprint = 0
+    # Count each bit across all hashes with C-level byte operations: take
+    # one byte of every hash, map each to one of its bits, count the ones
+    for byte in range(8):
+        column = digests[byte::8]
+        for bit, table in enumerate(BIT_TABLES):
+            if 2 * column.translate(table).count(1) > count:
+                fingerprint |= 1 << (8 * byte + bit)
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class SimHashIndex(object):
+    """Fingerprints searchable by Hamming distance without a linear scan.
+
+    Fingerprints are cut into `blocks` bit blocks, `blocks > distance`. Two
+    fingerprints at most `distance` bits apart differ in at most `distance`
+    blocks, so they agree exactly on at least one choice of
+    `blocks - distance` blocks. There is one table per such choice, keyed by
+    those blocks' bits; looking a fingerprint up in every table finds each
+    near match as a candidate, and only candidates are compared bit by bit.
+    This is Manku et al.'s permuted-table scheme with dict lookups in place
+    of sorted tables.
+
+    More blocks give longer keys and fewer candidates per lookup at the cost
+    of more tables: the defaults suit millions of pages, while hundreds of
+    millions want e.g. `blocks=6` (20 tables keyed by 32 bits), sharded
+    across machines by table.
+    """
+
+    def __init__(self, distance=3, blocks=None, bits=64):
+        blocks = blocks or distance + 1
+        if blocks <= distance:
+            raise ValueError('blocks must be more than distance')
+        bounds = [bits * i // blocks for i in range(blocks + 1)]
+        block_masks = [((1 << (high - low)) - 1) << low
+                       for low, high in zip(bounds, bounds[1:])]
+        self.masks = [sum(chosen) for chosen in
+                      combinations(block_masks, blocks - distance)]
+        # key: fingerprint & mask, value: fingerprint, or list of them
+        self.tables = [{} for _ in self.masks]
+        self.distance = distance
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, fingerprint):
+        return self.find(fingerprint) is not None
+
+    def add(self, fingerprint):
+        for mask, table in zip(self.masks, self.tables):
+            key = fingerprint & mask
+            bucket = table.get(key)
+            if bucket is None:
+                table[key] = fingerprint
+            elif isinstance(bucket, list):
+                bucket.append(fingerprint)
+            else:
+                table[key] = [bucket, fingerprint]
+        self.size += 1
+
+    def find(self, fingerprint):
+        """Return an indexed fingerprint within `distance` bits, else None."""
+        for mask, table in zip(self.masks, self.tables):
+            bucket = table.get(fingerprint & mask)
+            if bucket is None:
+                continue
+            if not isinstance(bucket, list):
+                bucket = (bucket,)
+            for candidate in bucket:
+                if hamming_distance(candidate, fingerprint) <= self.distance:
+                    return candidate
+        return None
@@ -1,35 +1,110 @@
 # -*- coding: utf-8 -*-
+import time
+
+from .web_crawler_frontier import Frontier, UrlTable
+from .web_crawler_simhash import SimHashIndex, simhash
 
 
 class PagesDataStore(object):
 
-    def __init__(self, db):
+    def __init__(self, db, crawl_delay=1.0, clock=time.monotonic,
+                 sleep=time.sleep, max_distance=3, seen=None):
         self.db = db
-        pass
-
-    def add_link_to_crawl(self, url):
-        """Add the given link to `links_to_crawl`."""
-        pass
+        # With a filter from web_crawler_filters, `urls` only holds queued
+        # links; the filter remembers the rest
+        self.seen = seen
+        self.seen_overflow = set()  # urls added once `seen` was full
+        self.urls = UrlTable()
+        self.links_to_crawl = Frontier(self.urls, crawl_delay)
+        self.crawled_links = {}  # key: url id, value: signature
+        self.signatures = SimHashIndex(max_distance)
+        self.clock = clock
+        self.sleep = sleep
+
+    def add_link_to_crawl(self, url, priority=1.0):
+        """Add the given link to `links_to_crawl`.
+
+        A link that is already queued gains `priority`, so pages linked from
+        many places are crawled sooner. Links already taken off the queue or
+        crawled are ignored, as are false positives of the `seen` filter.
+        Links a full cuckoo filter can't take are remembered exactly instead.
+        """
+        url_id = self.urls.id_of(url)
+        if url_id is None:
+            if self.seen is not None and not self._add_seen(url):
+                return
+            self.links_to_crawl.push(self.urls.add(url), priority)
+        elif url_id in self.links_to_crawl:
+            frontier = self.links_to_crawl
+            frontier.update(url_id, frontier.priority(url_id) + priority)
+
+    def _add_seen(self, url):
+        """Record `url` as seen, returning False if it already was."""
+        if url in self.seen_overflow:
+            return False
+        try:
+            return self.seen.add(url)
+        except IndexError:
+            self.seen_overflow.add(url)
+            return True
 
     def remove_link_to_crawl(self, url):
         """Remove the given link from `links_to_crawl`."""
-        pass
+        url_id = self.urls.id_of(url)
+        if url_id is not None and url_id in self.links_to_crawl:
+            self.links_to_crawl.remove(url_id)
+            if self.seen is not None:
+                self.urls.discard(url_id)
 
     def reduce_priority_link_to_crawl(self, url):
         """Reduce the priority of a link in `links_to_crawl` to avoid cycles."""
-        pass
-
-    def extract_max_priority_page(self):
-        """Return the highest priority link in `links_to_crawl`."""
-        pass
+        url_id = self.urls.id_of(url)
+        if url_id is not None and url_id in self.links_to_crawl:
+            frontier = self.links_to_crawl
+            frontier.update(url_id, frontier.priority(url_id) / 2)
+
+    def extract_max_priority_page(self, wait=True):
+        """Return the highest priority link in `links_to_crawl`.
+
+        Only links whose host is past its crawl delay are returned. With
+        `wait`, sleeps until one is; otherwise returns None if none is ready
+        yet. Returns None once `links_to_crawl` is empty.
+        """
+        while True:
+            url_id = self.links_to_crawl.pop(self.clock())
+            if url_id is not None:
+                url = self.urls.url(url_id)
+                if self.seen is not None:
+                    self.urls.discard(url_id)
+                return url
+            delay = self.ready_delay()
+            if delay is None or not wait:
+                return None
+            self.sleep(delay)
+
+    def ready_delay(self):
+        """Return seconds until a link is ready, None if there are none."""
+        ready_time = self.links_to_crawl.next_ready_time()
+        if ready_time is None:
+            return None
+        return max(0.0, ready_time - self.clock())
 
     def insert_crawled_link(self, url, signature):
-        """Add the given link to `crawled_links`."""
-        pass
+        """Add the given link to `crawled_links`.
+
+        With a `seen` filter, only the signature is kept in memory.
+        """
+        if self.seen is None:
+            self.crawled_links[self.urls.add(url)] = signature
+        if signature is not None:
+            self.signatures.add(signature)
 
     def crawled_similar(self, signature):
-        """Determine if we've already crawled a page matching the given signature"""
-        pass
+        """Determine if we've already crawled a page matching the given signature
+
+        Matching means within `max_distance` bits of a crawled page's SimHash.
+        """
+        return signature is not None and signature in self.signatures
 
 
 class Page(object):
@@ -41,14 +116,16 @@ class Page(object):
         self.signature = self.create_signature()
 
     def create_signature(self):
-        # Create signature based on url and contents
-        pass
+        # Based on contents only, so the same page under two urls matches
+        if not self.contents:
+            return None
+        return simhash(self.contents)
 
 
 class Crawler(object):
 
     def __init__(self, pages, data_store, reverse_index_queue, doc_index_queue):
-        self.pages = pages
+        self.pages = pages  # fetcher: pages.fetch(url) returns a Page or None
         self.data_store = data_store
         self.reverse_index_queue = reverse_index_queue
         self.doc_index_queue = doc_index_queue
@@ -61,13 +138,18 @@ class Crawler(object):
         self.data_store.remove_link_to_crawl(page.url)
         self.data_store.insert_crawled_link(page.url, page.signature)
 
+    def process_page(self, url, page):
+        """Handle the fetched `page` for `url`, None if it couldn't be fetched."""
+        if page is None:
+            self.data_store.remove_link_to_crawl(url)
+        elif self.data_store.crawled_similar(page.signature):
+            self.data_store.reduce_priority_link_to_crawl(page.url)
+        else:
+            self.crawl_page(page)
+
     def crawl(self):
         while True:
-            page = self.data_store.extract_max_priority_page()
-            if page is None:
+            url = self.data_store.extract_max_priority_page()
+            if url is None:
                 break
-            if self.data_store.crawled_similar(page.signature):
-                self.data_store.reduce_priority_link_to_crawl(page.url)
-            else:
-                self.crawl_page(page)
-            page = self.data_store.extract_max_priority_page()
+            self.process_page(url, self.pages.fetch(url))